@@ -0,0 +1,325 @@
+# 华脉招采平台 压测脚本
+# 在无界面模式下用 Streamlit AppTest 驱动 app.py（业务代码在 huamai 包内）：批量生成项目/产品/供应商，
+# 模拟多个供应商在截止前集中登录报价、管理员同时查看监控中心（后台线程持续写入报价作为并发压力），
+# 统计每次重跑的耗时分位数、报价吞吐、global_data 内存占用，并保存结果用于回归对比。
+#
+# 用法：
+#   python bench/load_test.py --projects 50 --products 40 --suppliers 15 --sessions 20
+#   python bench/load_test.py --save bench/results/base.json
+#   python bench/load_test.py --baseline bench/results/base.json   # 与基线对比，退化超过阈值时返回非零
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import types
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_PATH = os.path.join(ROOT, "app.py")
+ADMIN_USER, ADMIN_PASS = "HUAMAI", "HUAMAI888"
+
+
+def parse_args():
+    ap = argparse.ArgumentParser(description="华脉招采平台 并发压测")
+    ap.add_argument("--projects", type=int, default=20, help="项目数")
+    ap.add_argument("--products", type=int, default=30, help="每个项目的产品数")
+    ap.add_argument("--suppliers", type=int, default=10, help="每个项目的供应商数")
+    ap.add_argument("--history", type=int, default=2, help="每个供应商在每个产品上的历史报价数")
+    ap.add_argument("--sessions", type=int, default=8, help="并发供应商会话数")
+    ap.add_argument("--admins", type=int, default=2, help="并发管理员会话数")
+    ap.add_argument("--bids-per-session", type=int, default=10, help="每个供应商会话提交的报价数")
+    ap.add_argument("--admin-reruns", type=int, default=10, help="每个管理员会话刷新监控中心的次数")
+    ap.add_argument("--supplier-reruns", type=int, default=5, help="每个供应商会话在报价前空刷新页面的次数")
+    ap.add_argument("--startup-runs", type=int, default=3, help="冷启动测量次数（每次一个新进程）")
+    ap.add_argument("--writers", type=int, default=4, help="会话压测期间的后台写入线程数")
+    ap.add_argument("--write-rate", type=float, default=50, help="后台写入的总速率（报价/秒）")
+    ap.add_argument("--ingest-threads", type=int, default=16, help="直接写入压测的线程数")
+    ap.add_argument("--ingest-bids", type=int, default=5000, help="直接写入压测的报价总数")
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--tracemalloc", action="store_true", help="统计 Python 分配峰值（会明显拖慢压测）")
+    ap.add_argument("--save", help="结果保存路径（JSON）")
+    ap.add_argument("--baseline", help="基线结果路径（JSON），用于回归对比")
+    ap.add_argument("--tolerance", type=float, default=0.2, help="允许的退化比例，默认 20%%")
+    return ap.parse_args()
+
+
+# --- 统计工具 ---
+def percentiles(samples):
+    if not samples: return {"n": 0}
+    xs = sorted(samples)
+    pick = lambda q: xs[min(len(xs) - 1, int(round(q * (len(xs) - 1))))]
+    return {"n": len(xs), "mean_ms": round(sum(xs) / len(xs) * 1000, 2),
+            "p50_ms": round(pick(0.5) * 1000, 2), "p95_ms": round(pick(0.95) * 1000, 2),
+            "p99_ms": round(pick(0.99) * 1000, 2), "max_ms": round(xs[-1] * 1000, 2)}
+
+
+# --- 生成数据 ---
+def seed_data(app, args, rng):
+    deadline = (datetime.now() + timedelta(hours=2)).strftime("%Y-%m-%d %H:%M")
+    creds = []
+    t0 = time.perf_counter()
+    for i in range(args.projects):
+        pid = f"bench{i:04d}"
+        codes = {f"SUP{i:04d}_{j:02d}": f"{rng.randrange(10**6):06d}" for j in range(args.suppliers)}
+        app.commit("project_create", {"pid": pid, "name": f"压测项目{i}", "deadline": deadline, "codes": codes,
+                                      "creds": {s: app.make_cred(app.global_data, s, c) for s, c in codes.items()}})
+        items = [{"name": f"物料{k:04d}", "quantity": rng.randint(1, 500), "desc": f"规格{k}"} for k in range(args.products)]
+        app.commit("products_add_batch", {"pid": pid, "items": items})
+        for s in codes:
+            for h in range(args.history):
+                app.submit_bids_batch(pid, s, [(it["name"], round(rng.uniform(10, 1000), 2), "") for it in items], f"seed-{s}-{h}")
+        creds += [(pid, s, c) for s, c in codes.items()]
+    return creds, time.perf_counter() - t0
+
+
+# --- 场景 ---
+def bench_cold_start(app):
+    # 重新执行“快照 + 日志重放”，即进程重启后的加载耗时
+    t0 = time.perf_counter()
+    app.init_global_data.__wrapped__()
+    return time.perf_counter() - t0
+
+
+STARTUP_PROBE = r"""
+import json, sys, time
+t0 = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file(sys.argv[1], default_timeout=120).run()
+first = time.perf_counter() - t0
+t1 = time.perf_counter(); at.run(); login_rerun = time.perf_counter() - t1
+pandas_after_login = "pandas" in sys.modules
+at.text_input[0].input(sys.argv[2]); at.text_input[1].input(sys.argv[3])
+next(b for b in at.button if b.label == "立即登录").click()
+t2 = time.perf_counter(); at.run(); supplier_first = time.perf_counter() - t2
+assert not at.exception, at.exception
+print(json.dumps({"first_run_s": first, "login_rerun_s": login_rerun, "supplier_first_s": supplier_first,
+                  "pandas_after_login": pandas_after_login, "pandas_after_supplier": "pandas" in sys.modules}))
+"""
+
+
+def bench_startup(creds, args):
+    # 每次起一个新进程：首次打开登录页（导入 + 加载状态 + 首次渲染），再以供应商身份进入报价页
+    runs = []
+    _, user, code = creds[0]
+    for _ in range(args.startup_runs):
+        out = subprocess.run([sys.executable, "-c", STARTUP_PROBE, APP_PATH, user, code], capture_output=True, text=True, check=True)
+        runs.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    return {"first_run": percentiles([r["first_run_s"] for r in runs]), "login_rerun": percentiles([r["login_rerun_s"] for r in runs]),
+            "supplier_first": percentiles([r["supplier_first_s"] for r in runs]),
+            "pandas_after_login": runs[-1]["pandas_after_login"], "pandas_after_supplier": runs[-1]["pandas_after_supplier"]}
+
+
+def bench_ingest(app, creds, args, rng):
+    # 绕过界面直接调用 submit_bid，测量写入路径的吞吐上限
+    latencies, lock = [], threading.Lock()
+    per_thread = max(1, args.ingest_bids // args.ingest_threads)
+    products = {pid: list(app.global_data["projects"][pid]["products"]) for pid, _, _ in creds}
+
+    def worker(n):
+        local = []
+        r = random.Random(args.seed + n)
+        for k in range(per_thread):
+            pid, sup, _ = r.choice(creds)
+            t0 = time.perf_counter()
+            app.submit_bid(pid, r.choice(products[pid]), sup, round(r.uniform(10, 1000), 2), "", None, f"ingest-{n}-{k}")
+            local.append(time.perf_counter() - t0)
+        with lock: latencies.extend(local)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(args.ingest_threads)]
+    t0 = time.perf_counter()
+    for t in threads: t.start()
+    for t in threads: t.join()
+    wall = time.perf_counter() - t0
+    return {"latency": percentiles(latencies), "bids": len(latencies), "bids_per_sec": round(len(latencies) / wall, 1)}
+
+
+def load_app():
+    # 状态与指标都在 huamai 包里，压测线程与 AppTest 会话导入的是同一个模块，共享同一份 global_data
+    from huamai import exporter, metrics, state
+    return types.SimpleNamespace(**(vars(metrics) | vars(state) | vars(exporter)))
+
+
+def new_session():
+    from streamlit.testing.v1 import AppTest
+    return AppTest.from_file(APP_PATH, default_timeout=120)
+
+
+def timed_run(at, samples):
+    t0 = time.perf_counter()
+    at.run()
+    samples.append(time.perf_counter() - t0)
+    if at.exception: raise RuntimeError(at.exception[0].value)
+    return at
+
+
+def login(at, user, password, samples):
+    timed_run(at, samples)
+    at.text_input[0].input(user); at.text_input[1].input(password)
+    next(b for b in at.button if b.label == "立即登录").click()
+    return timed_run(at, samples)
+
+
+def supplier_session(cred, args, out):
+    pid, user, code = cred
+    rng = random.Random(f"{args.seed}-{user}")
+    at = login(new_session(), user, code, out["login"])
+    yield
+    if at.radio and at.radio[0].value != "逐项报价":
+        at.radio[0].set_value("逐项报价"); timed_run(at, out["supplier_rerun"])
+        yield
+    for _ in range(args.supplier_reruns):
+        timed_run(at, out["supplier_rerun"])
+        yield
+    for _ in range(args.bids_per_session):
+        idx = rng.randrange(len(at.number_input))
+        at.number_input[idx].set_value(round(rng.uniform(10, 1000), 2))
+        [b for b in at.button if b.label == "提交报价"][idx].click()
+        timed_run(at, out["bid_submit"])
+        yield
+
+
+def admin_session(pid, args, out):
+    at = login(new_session(), ADMIN_USER, ADMIN_PASS, out["login"])
+    yield
+    at.sidebar.radio[0].set_value("监控中心")
+    timed_run(at, out["admin_rerun"])
+    yield
+    at.selectbox[0].set_value(pid)
+    for _ in range(args.admin_reruns):
+        timed_run(at, out["admin_rerun"])
+        yield
+
+
+def background_writer(app, creds, args, n, stop, counter):
+    # 以固定速率直接写入报价，模拟界面之外的其他供应商
+    r = random.Random(f"{args.seed}-bg-{n}")
+    interval = args.writers / max(args.write_rate, 1e-6)
+    k = 0
+    while not stop.is_set():
+        pid, sup, _ = r.choice(creds)
+        prods = list(app.global_data["projects"][pid]["products"])
+        bid, _ = app.submit_bid(pid, r.choice(prods), sup, round(r.uniform(10, 1000), 2), "", None, f"bg-{n}-{k}")
+        if bid: counter.append(1)
+        k += 1
+        stop.wait(interval)
+
+
+def bench_sessions(app, creds, args, rng):
+    # AppTest 不是线程安全的：各界面会话按轮次交错重跑，
+    # 同时由后台线程按 --write-rate 持续写入报价，模拟截止前其他供应商的并发压力
+    out = {"login": [], "supplier_rerun": [], "bid_submit": [], "admin_rerun": []}
+    errors = []
+    hot = rng.sample(creds, min(args.sessions, len(creds)))
+    sessions = [(c[1], supplier_session(c, args, out)) for c in hot]
+    sessions += [("admin", admin_session(hot[i % len(hot)][0], args, out)) for i in range(args.admins)]
+    stop, bg_bids = threading.Event(), []
+    writers = [threading.Thread(target=background_writer, args=(app, creds, args, n, stop, bg_bids), daemon=True) for n in range(args.writers)]
+    bids_before = sum(p.get("bid_seq", 0) for p in app.global_data["projects"].values())
+    t0 = time.perf_counter()
+    for t in writers: t.start()
+    while sessions:
+        for item in list(sessions):
+            name, gen = item
+            try: next(gen)
+            except StopIteration: sessions.remove(item)
+            except Exception as e:
+                errors.append(f"{name}: {e}"); sessions.remove(item)
+    stop.set()
+    for t in writers: t.join()
+    wall = time.perf_counter() - t0
+    bids = sum(p.get("bid_seq", 0) for p in app.global_data["projects"].values()) - bids_before
+    result = {k: percentiles(v) for k, v in out.items()}
+    result.update({"wall_s": round(wall, 2), "bids": bids, "ui_bids": len(out["bid_submit"]), "background_bids": len(bg_bids),
+                   "bids_per_sec": round(bids / wall, 2), "errors": errors[:20]})
+    return result
+
+
+def server_timings(app):
+    # 应用自身记录的服务端耗时（不含 AppTest 的调度开销）：整次脚本执行 script:* 与每页控件数
+    m = app.get_metrics()
+    with m["lock"]: hists = {k: dict(v) for k, v in m["hists"].items()}
+    out = {}
+    for (family, label), h in sorted(hists.items()):
+        if not h["count"] or not (label.startswith("script:") or family == "widgets_per_rerun"): continue
+        key = label if family == "duration_seconds" else f"widgets:{label}"
+        scale = 1000 if family == "duration_seconds" else 1
+        out[key] = {"n": h["count"], "mean": round(h["sum"] / h["count"] * scale, 2),
+                    "p95": round(app.hist_quantile(h, 0.95) * scale, 2), "max": round(h["max"] * scale, 2)}
+    return out
+
+
+# --- 回归对比 ---
+COMPARE_KEYS = [("cold_start_s", None), ("startup", "first_run.p50_ms"), ("startup", "supplier_first.p50_ms"), ("ingest", "latency.p95_ms"), ("sessions", "supplier_rerun.p95_ms"),
+                ("sessions", "admin_rerun.p95_ms"), ("sessions", "login.p95_ms"),
+                ("server", "script:supplier.mean"), ("server", "script:admin.mean"), ("memory", "global_data_bytes")]
+
+
+def dig(d, path):
+    for k in path.split("."): d = d.get(k, {}) if isinstance(d, dict) else {}
+    return d if isinstance(d, (int, float)) else None
+
+
+def compare(result, baseline, tolerance):
+    regressions = []
+    for section, path in COMPARE_KEYS:
+        cur = result.get(section) if path is None else dig(result.get(section, {}), path)
+        base = baseline.get(section) if path is None else dig(baseline.get(section, {}), path)
+        if not cur or not base: continue
+        change = cur / base - 1
+        name = section if path is None else f"{section}.{path}"
+        print(f"  {name:40s} {base:>12.2f} -> {cur:>12.2f}  ({change:+.1%})")
+        if change > tolerance: regressions.append(name)
+    return regressions
+
+
+def main():
+    args = parse_args()
+    rng = random.Random(args.seed)
+    os.environ["HUAMAI_DATA_DIR"] = tempfile.mkdtemp(prefix="huamai_bench_")
+    sys.path.insert(0, ROOT)
+    if args.tracemalloc: tracemalloc.start()
+
+    t0 = time.perf_counter()
+    app = load_app()  # 需在设置数据目录之后加载
+    import_s = time.perf_counter() - t0
+
+    creds, seed_s = seed_data(app, args, rng)
+    result = {
+        "started": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "config": {k: v for k, v in vars(args).items() if k not in ("save", "baseline")},
+        "import_s": round(import_s, 3), "seed_s": round(seed_s, 2),
+        "cold_start_s": round(bench_cold_start(app), 3),
+        "startup": bench_startup(creds, args),
+        "ingest": bench_ingest(app, creds, args, rng),
+        "sessions": bench_sessions(app, creds, args, rng),
+    }
+    result["server"] = server_timings(app)
+    n_bids = sum(len(p.get("bids", [])) for d in app.global_data["projects"].values() for p in d["products"].values())
+    mem = app.memory_report()
+    result["memory"] = {"global_data_bytes": mem["total"], "projects_bytes": mem["projects"], "bids_bytes": mem["bids"],
+                        "attachment_bytes": mem["attachments"], "bids": n_bids, "max_rss_bytes": app.max_rss_bytes()}
+    if args.tracemalloc: result["memory"]["tracemalloc_peak_bytes"] = tracemalloc.get_traced_memory()[1]
+
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, "w", encoding="utf-8") as f: json.dump(result, f, ensure_ascii=False, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f: baseline = json.load(f)
+        print(f"\n与基线对比（{args.baseline}）：")
+        regressions = compare(result, baseline, args.tolerance)
+        if regressions:
+            print(f"\n性能退化超过 {args.tolerance:.0%}：{', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,455 @@
+import streamlit as st
+import pandas as pd
+import uuid
+import os
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+import hashlib
+from huamai.metrics import timed, rate, get_metrics, max_rss_bytes, RATE_WINDOW, hist_quantile
+from huamai.storage import store_uploaded_file, render_attachment, blob_cache_stats
+from huamai.state import global_data, get_lock, commit, generate_random_code, make_cred, safe_parse_deadline, supplier_category_list, search_suppliers, SUPPLIER_FIELDS, product_summary, get_stats, deadline_ts
+from huamai.exporter import export_metrics, METRICS_INTERVAL, METRICS_FILE, prometheus_text
+from huamai.sheets import sheet_template, PRODUCT_SHEET_COLUMNS, parse_product_sheet
+from huamai.analytics import bid_frame, latest_bids, min_cost_award, supplier_totals, price_spread, bid_trend, product_trend, filter_bids, build_bid_frame
+from huamai.reports import report_path, REPORT_KINDS, request_report, report_status, read_report
+from huamai.archive import archive_project, ARCHIVE_GRACE_DAYS, ARCHIVE_DIR, archive_path, load_archive, read_archive_blob, restore_project
+from huamai.live import start_live_watch
+
+# --- 管理员端页面 ---
+PROJECT_PAGE_SIZE = 10
+SUPPLIER_PAGE_SIZE = 50
+SUPPLIER_PICKER_LIMIT = 200
+# 每家供应商的访问码都要单独做一次 pbkdf2（约 5ms），一次邀请的家数过多会让创建请求卡住数十秒
+INVITE_ALL_LIMIT = 500
+
+def query_projects(keyword="", status="全部", date_range=()):
+    # 在按截止时间排序的索引上二分定位状态/日期区间，再按名称过滤；结果按截止时间倒序
+    index = global_data["proj_index"]
+    key = lambda e: e[0]
+    now_ts = datetime.now().timestamp()
+    lo, hi = 0, len(index)
+    if status == "进行中": lo = bisect_right(index, now_ts, key=key)
+    elif status == "已截止": hi = bisect_right(index, now_ts, key=key)
+    if date_range:
+        lo = max(lo, bisect_left(index, datetime.combine(date_range[0], datetime.min.time()).timestamp(), key=key))
+        if len(date_range) > 1: hi = min(hi, bisect_right(index, datetime.combine(date_range[1], datetime.max.time()).timestamp(), key=key))
+    projects, kw = global_data["projects"], keyword.lower()
+    return [pid for _, pid in reversed(index[lo:hi]) if pid in projects and (not kw or kw in projects[pid]["name"].lower())]
+
+@timed("render_project_manager")
+def render_project_manager(pid, pdata):
+    # 1. 供应商管理
+    st.markdown("#### 🔑 供应商授权")
+    st.info("💡 鼠标悬停在账号/密码上，点击右上角图标复制")
+    codes = pdata.get("codes", {})
+    if codes:
+        st.markdown('<div class="ui-card">', unsafe_allow_html=True)
+        h1, h2, h3, h4 = st.columns([1.5, 2, 2, 1])
+        h1.markdown("**供应商**"); h2.markdown("**账号**"); h3.markdown("**密码**"); h4.markdown("**操作**")
+        st.markdown("<hr style='margin:5px 0'>", unsafe_allow_html=True)
+        for s_name, s_code in list(codes.items()):
+            r1, r2, r3, r4 = st.columns([1.5, 2, 2, 1])
+            with r1: st.markdown(f"<div style='margin-top:5px'>{s_name}</div>", unsafe_allow_html=True)
+            with r2: st.code(s_name, language=None)
+            with r3: st.code(s_code, language=None)
+            with r4: 
+                if st.button("移除", key=f"rm_{pid}_{s_name}"):
+                    with get_lock(f"project:{pid}"): commit("code_remove", {"pid": pid, "supplier": s_name})
+                    st.rerun()
+        # 追加供应商
+        st.markdown("<hr style='margin:10px 0'>", unsafe_allow_html=True)
+        ac1, ac2 = st.columns([3, 1])
+        new_sup = ac1.text_input("追加供应商", key=f"add_{pid}", label_visibility="collapsed", placeholder="输入名称")
+        if ac2.button("追加", key=f"btn_{pid}"):
+            if new_sup and new_sup not in codes:
+                new_code = generate_random_code()
+                commit("code_add", {"pid": pid, "supplier": new_sup, "code": new_code, "cred": make_cred(global_data, new_sup, new_code)})
+                st.rerun()
+        st.markdown('</div>', unsafe_allow_html=True)
+
+    # 2. 产品管理（核心修改：增加甲方上传附件）
+    st.markdown("#### 📦 询价产品列表")
+    prods = pdata.get("products", {})
+
+    # --- 添加产品表单 ---
+    with st.form(f"add_p_{pid}", border=True):
+        st.caption("添加新产品")
+        # 调整列布局以容纳文件上传
+        c1, c2, c3, c4, c5 = st.columns([2, 1, 2, 2, 1])
+        pn = c1.text_input("产品名", placeholder="如：光缆接头盒")
+        pq = c2.number_input("数量", min_value=1, value=1)
+        pd_ = c3.text_input("描述", placeholder="规格型号")
+        # 新增：上传控件
+        pf_up = c4.file_uploader("规格书/图纸", key=f"up_spec_{pid}")
+
+        sub_new_prod = c5.form_submit_button("添加", use_container_width=True, type="primary")
+
+        if sub_new_prod and pn:
+            # 处理甲方上传的文件
+            admin_file_data = store_uploaded_file(pf_up)
+            commit("product_add", {
+                "pid": pid,
+                "name": pn,
+                "quantity": pq, 
+                "desc": pd_, 
+                "admin_file": admin_file_data # 只存附件元数据
+            })
+            st.rerun()
+    # -------------------
+
+    with st.expander("📥 从 CSV / Excel 批量导入产品"):
+        ic1, ic2 = st.columns([3, 1])
+        imp = ic1.file_uploader("产品清单", type=["csv", "xlsx"], key=f"imp_{pid}", label_visibility="collapsed")
+        ic2.download_button("📄 下载模板", data=sheet_template(PRODUCT_SHEET_COLUMNS), file_name="产品清单模板.csv",
+                            mime="text/csv", key=f"imp_tpl_{pid}", on_click="ignore", use_container_width=True)
+        if imp is not None and ic2.button("导入", key=f"imp_btn_{pid}", type="primary", use_container_width=True):
+            items, errors = parse_product_sheet(imp, prods)
+            for e in errors[:20]: st.warning(e)
+            if len(errors) > 20: st.warning(f"……另有 {len(errors) - 20} 条问题")
+            if items:
+                with get_lock(f"project:{pid}"): commit("products_add_batch", {"pid": pid, "items": items})
+                st.success(f"已导入 {len(items)} 个产品")
+
+    if prods:
+        st.markdown('<div class="ui-card">', unsafe_allow_html=True)
+        for pdn, pdi in list(prods.items()):
+            c1, c2 = st.columns([6, 1])
+            # 显示产品信息，如果有附件显示标记
+            desc_text = f" - {pdi.get('desc')}" if pdi.get('desc') else ""
+            file_icon = "📎(含附件)" if pdi.get("admin_file") else ""
+
+            c1.markdown(f"• **{pdn}** (x{pdi['quantity']}){desc_text}  <span style='color:#3b82f6; font-size:0.8em'>{file_icon}</span>", unsafe_allow_html=True)
+
+            if c2.button("删除", key=f"del_p_{pid}_{pdn}"):
+                with get_lock(f"project:{pid}"): commit("product_delete", {"pid": pid, "name": pdn})
+                st.rerun()
+        st.markdown('</div>', unsafe_allow_html=True)
+
+    b1, b2, _ = st.columns([1, 1, 3])
+    if b1.button("🗑️ 删除整个项目", key=f"del_proj_{pid}"):
+        with get_lock(f"project:{pid}"): commit("project_delete", {"pid": pid})
+        st.rerun()
+    if datetime.now() > safe_parse_deadline(pdata["deadline"]) and b2.button("📦 立即归档", key=f"arc_proj_{pid}"):
+        if archive_project(pid): st.rerun()
+        else: st.warning("项目正在变更，请稍后重试")
+
+@timed("render_admin_dashboard")
+def render_admin_dashboard():
+    with st.sidebar:
+        st.markdown("### 👮‍♂️ 管理员控制台")
+        menu = st.radio("导航", ["项目管理", "供应商库", "监控中心", "归档库", "系统状态"], label_visibility="collapsed")
+        st.markdown("---")
+        if st.button("🚪 退出系统", use_container_width=True):
+            st.session_state.clear(); st.rerun()
+
+    # ================= 项目管理 =================
+    if menu == "项目管理":
+        st.subheader("📁 项目管理")
+        
+        # 新建项目
+        with st.expander("➕ 创建新询价项目", expanded=False):
+            # 先按产品类型/关键字筛选供应商，候选只列出一部分，已选的始终保留在选项中
+            g1, g2 = st.columns([2, 2])
+            pick_cats = g1.multiselect("按产品类型筛选供应商", supplier_category_list(global_data), placeholder="全部产品类型", key="np_cats")
+            pick_kw = g2.text_input("搜索供应商", placeholder="🔍 名称 / 联系人 / 电话", key="np_kw")
+            matched = search_suppliers(global_data, pick_kw, pick_cats)
+            chosen = st.session_state.get("np_sups", [])
+            options = chosen + [n for n in matched[:SUPPLIER_PICKER_LIMIT] if n not in chosen]
+            if len(matched) > INVITE_ALL_LIMIT: st.caption(f"匹配 {len(matched)} 家，超过单次邀请上限 {INVITE_ALL_LIMIT} 家，请先按类型或关键字缩小范围")
+            elif len(matched) > SUPPLIER_PICKER_LIMIT: st.caption(f"匹配 {len(matched)} 家，下拉框仅列出前 {SUPPLIER_PICKER_LIMIT} 家，可勾选「邀请全部匹配」")
+            with st.form("new_proj"):
+                c1, c2, c3 = st.columns([2, 1, 1])
+                p_name = c1.text_input("项目名称")
+                p_date = c2.date_input("截止日期")
+                p_time = c3.time_input("截止时间", value=datetime.strptime("17:00", "%H:%M").time())
+                sel_sups = st.multiselect("选择参与供应商", options, key="np_sups", placeholder="可先在上方按类型或关键字筛选")
+                invite_all = st.checkbox(f"邀请全部匹配的供应商（{len(matched)} 家）", disabled=not matched or len(matched) > INVITE_ALL_LIMIT)
+                
+                if st.form_submit_button("立即创建", type="primary"):
+                    if invite_all: sel_sups = list(dict.fromkeys(sel_sups + matched))
+                    if not p_name or not sel_sups:
+                        st.error("信息不完整")
+                    elif len(sel_sups) > INVITE_ALL_LIMIT:
+                        st.error(f"单次最多邀请 {INVITE_ALL_LIMIT} 家供应商，请缩小筛选范围后分批追加")
+                    else:
+                        pid = str(uuid.uuid4())[:8]
+                        codes = {s: generate_random_code() for s in sel_sups}
+                        commit("project_create", {
+                            "pid": pid,
+                            "name": p_name,
+                            "deadline": f"{p_date} {p_time.strftime('%H:%M')}",
+                            "codes": codes,
+                            "creds": {s: make_cred(global_data, s, c) for s, c in codes.items()}
+                        })
+                        st.success("创建成功"); st.rerun()
+
+        # 项目列表
+        if not global_data["projects"]:
+            st.info("暂无项目")
+        else:
+            f1, f2, f3 = st.columns([2, 1, 2])
+            kw = f1.text_input("搜索项目", placeholder="🔍 按项目名称搜索", label_visibility="collapsed").strip()
+            status = f2.selectbox("状态", ["全部", "进行中", "已截止"], label_visibility="collapsed")
+            d_range = f3.date_input("截止日期范围", value=[], label_visibility="collapsed")
+            pids = query_projects(kw, status, d_range)
+            
+            total_pages = max(1, -(-len(pids) // PROJECT_PAGE_SIZE))
+            if st.session_state.get("proj_page", 1) > total_pages: st.session_state["proj_page"] = total_pages
+            now = datetime.now()
+            st.caption(f"共 {len(pids)} 个项目")
+            
+            page = st.session_state.get("proj_page", 1)
+            for pid in pids[(page - 1) * PROJECT_PAGE_SIZE: page * PROJECT_PAGE_SIZE]:
+                pdata = global_data["projects"].get(pid)
+                if not pdata: continue
+                # 只渲染展开的项目，其余项目仅显示一行摘要
+                is_open = st.session_state.get("open_pid") == pid
+                closed = now > safe_parse_deadline(pdata["deadline"])
+                r1, r2 = st.columns([7, 1])
+                r1.markdown(f"{'🔒' if closed else '🟢'} **{pdata['name']}** <span style='color:#666; font-size:0.9em'>📅 {pdata['deadline']} · 供应商 {len(pdata.get('codes', {}))} · 产品 {len(pdata.get('products', {}))}</span>", unsafe_allow_html=True)
+                if r2.button("收起" if is_open else "管理", key=f"open_{pid}", use_container_width=True):
+                    st.session_state["open_pid"] = None if is_open else pid; st.rerun()
+                if is_open:
+                    with st.container(border=True): render_project_manager(pid, pdata)
+            
+            if total_pages > 1:
+                st.number_input(f"页码（共 {total_pages} 页）", min_value=1, max_value=total_pages, step=1, key="proj_page")
+    # ================= 供应商库 =================
+    elif menu == "供应商库":
+        st.subheader("🏢 供应商数据库")
+        f1, f2 = st.columns([2, 2])
+        kw = f1.text_input("搜索供应商", placeholder="🔍 名称 / 联系人 / 电话", label_visibility="collapsed", key="sup_kw").strip()
+        cats = f2.multiselect("产品类型", supplier_category_list(global_data), placeholder="全部产品类型", label_visibility="collapsed", key="sup_cats")
+        names = search_suppliers(global_data, kw, cats)
+        total_pages = max(1, -(-len(names) // SUPPLIER_PAGE_SIZE))
+        if st.session_state.get("sup_page", 1) > total_pages: st.session_state["sup_page"] = total_pages
+        page = st.session_state.get("sup_page", 1)
+        page_names = names[(page - 1) * SUPPLIER_PAGE_SIZE: page * SUPPLIER_PAGE_SIZE]
+        st.caption(f"共 {len(names)} 家供应商" + (f"（全库 {len(global_data['suppliers'])} 家）" if kw or cats else ""))
+
+        # 只编辑当前页；行号对应 page_names 中的原名称，用于识别改名和删除，新增行的行号在其后
+        orig = [{f: str(global_data["suppliers"].get(n, {}).get(f) or "") for f in SUPPLIER_FIELDS} for n in page_names]
+        df = pd.DataFrame([{"供应商": n} | {label: info[f] for f, label in SUPPLIER_FIELDS.items()} for n, info in zip(page_names, orig)],
+                          columns=["供应商"] + list(SUPPLIER_FIELDS.values()))
+        with st.container():
+            st.markdown('<div class="ui-card">', unsafe_allow_html=True)
+            editor_key = f"sup_editor_{page}_{hashlib.md5(f'{kw}|{cats}'.encode()).hexdigest()[:8]}"
+            edited_df = st.data_editor(df, num_rows="dynamic", use_container_width=True, hide_index=True, key=editor_key)
+            if total_pages > 1:
+                st.number_input(f"页码（共 {total_pages} 页）", min_value=1, max_value=total_pages, step=1, key="sup_page")
+            if st.button("💾 保存更改", type="primary"):
+                rows, deleted = {}, [n for i, n in enumerate(page_names) if i not in edited_df.index]
+                cell = lambda row, c: "" if pd.isna(row.get(c)) else str(row.get(c)).strip()
+                for idx, row in edited_df.iterrows():
+                    name = cell(row, "供应商")
+                    old = page_names[idx] if isinstance(idx, int) and idx < len(page_names) else None
+                    if not name:
+                        if old: deleted.append(old)
+                        continue
+                    info = {f: cell(row, label) for f, label in SUPPLIER_FIELDS.items()}
+                    if old and old != name: deleted.append(old)
+                    if old != name or info != orig[idx]: rows[name] = info
+                if rows or deleted:
+                    commit("suppliers_upsert", {"rows": rows, "deleted": deleted})
+                    st.session_state.pop(editor_key, None)
+                    st.success(f"已保存：修改/新增 {len(rows)} 家，删除 {len(deleted)} 家"); st.rerun()
+                else: st.info("没有需要保存的更改")
+            st.markdown('</div>', unsafe_allow_html=True)
+
+    # ================= 监控中心 =================
+    elif menu == "监控中心":
+        st.subheader("📊 报价分析看板")
+        proj_opts = {pid: f"{d['deadline']} | {d['name']}" for pid, d in list(global_data["projects"].items())}
+        sel_pid = st.selectbox("选择项目", options=list(proj_opts.keys()), format_func=lambda x: proj_opts[x])
+        
+        if sel_pid:
+            pdata = global_data["projects"].get(sel_pid, {})
+            products = pdata.get("products", {})
+            # 有新报价或报告生成完成时才重跑看板
+            start_live_watch("live_admin", lambda: (sel_pid in global_data["projects"], pdata.get("version", 0),
+                                                    tuple(os.path.exists(report_path(sel_pid, pdata.get("version", 0), k)) for k in REPORT_KINDS)))
+            
+            # 汇总（读取增量维护的聚合，不再逐条扫描报价）
+            summary = [product_summary(pn, pinfo) for pn, pinfo in list(products.items())]
+            
+            st.markdown('<div class="ui-card">', unsafe_allow_html=True)
+            st.markdown("#### 🏆 比价汇总")
+            st.caption("最低单价与推荐供应商按各供应商的最新报价计算，修改过的报价以最后一次为准")
+            st.dataframe(pd.DataFrame(summary), use_container_width=True)
+            st.markdown('</div>', unsafe_allow_html=True)
+
+            df = bid_frame(sel_pid, pdata.get("version", 0))
+            if not df[df["price"] > 0].empty:
+                latest = latest_bids(df)
+                t1, t2, t3 = st.tabs(["💰 整单比价", "📐 价格分布", "📈 报价趋势"])
+                with t1:
+                    award = min_cost_award(latest)
+                    st.metric("分项最低授标总价", f"¥{award['line_total'].sum():,.2f}")
+                    st.markdown("**各供应商总价（按最新报价）**")
+                    st.dataframe(supplier_totals(latest, len(products)).rename(columns={
+                        "supplier": "供应商", "quoted": "报价产品数", "total": "报价总额", "firsts": "最低价产品数", "coverage": "覆盖率"
+                    }), use_container_width=True, hide_index=True, column_config={"覆盖率": st.column_config.ProgressColumn(min_value=0, max_value=1, format="percent")})
+                    st.markdown("**分项授标明细**")
+                    st.dataframe(award.rename(columns={"product": "产品", "supplier": "供应商", "price": "单价", "quantity": "数量", "line_total": "小计"}),
+                                 use_container_width=True, hide_index=True)
+                with t2:
+                    st.dataframe(price_spread(latest).rename(columns={
+                        "product": "产品", "count": "报价家数", "min": "最低", "median": "中位数", "max": "最高", "p25": "P25", "p75": "P75", "spread": "价差率"
+                    }), use_container_width=True, hide_index=True, column_config={"价差率": st.column_config.NumberColumn(format="percent")})
+                    st.markdown("**各报价相对中位数**")
+                    st.dataframe(latest[["product", "supplier", "price", "rank", "vs_median"]].rename(columns={
+                        "product": "产品", "supplier": "供应商", "price": "单价", "rank": "名次", "vs_median": "较中位数"
+                    }), use_container_width=True, hide_index=True, column_config={"较中位数": st.column_config.NumberColumn(format="percent")})
+                    chart_p = st.selectbox("各供应商最新报价", list(latest["product"].unique()), key=f"chart_{sel_pid}")
+                    if chart_p in products:
+                        sup_stats = get_stats(products[chart_p])["suppliers"]
+                        st.bar_chart(pd.DataFrame({"supplier": list(sup_stats), "price": [v["latest"] for v in sup_stats.values()]}), x="supplier", y="price", color="#3b82f6")
+                with t3:
+                    st.line_chart(bid_trend(df))
+                    trend_p = st.selectbox("产品最低价走势", list(latest["product"].unique()), key=f"trend_{sel_pid}")
+                    if trend_p is not None: st.line_chart(product_trend(df, trend_p))
+            
+            # 报告导出：点击生成后才在后台构建，生成完成前不阻塞页面；报价更新后仍可下载上一版
+            st.markdown("#### 📄 导出比价报告")
+            rc = st.columns(len(REPORT_KINDS))
+            for col, (kind, (label, mime)) in zip(rc, REPORT_KINDS.items()):
+                status, ver, path = report_status(sel_pid, kind)
+                with col:
+                    if status == "pending": st.button(f"{label}（生成中…）", disabled=True, key=f"rpt_gen_{sel_pid}_{kind}", use_container_width=True)
+                    elif status != "ready":
+                        if status == "failed": st.error(f"{label} 生成失败")
+                        if status == "stale": st.caption("报价已更新，当前报告不是最新")
+                        if st.button(f"生成 {label}" if status == "none" else f"重新生成 {label}", key=f"rpt_gen_{sel_pid}_{kind}", use_container_width=True):
+                            request_report(sel_pid, kind); st.rerun()
+                    if path:
+                        st.download_button(label if status == "ready" else f"{label}（上一版）", data=lambda v=ver, k=kind: read_report(sel_pid, v, k),
+                                           file_name=f"{pdata['name']}_比价报告.{kind}", mime=mime, key=f"rpt_{sel_pid}_{kind}", on_click="ignore", use_container_width=True)
+            
+            # 详细：整个项目一张可排序、可筛选的表格，选中某行才提供附件下载
+            st.markdown("#### 📈 报价明细与附件")
+            if df.empty: st.info("暂无报价")
+            else:
+                f1, f2, f3 = st.columns([2, 2, 1])
+                sel_prods = f1.multiselect("产品", list(df["product"].cat.categories), key=f"dt_p_{sel_pid}", placeholder="全部产品")
+                sel_sups = f2.multiselect("供应商", list(df["supplier"].cat.categories), key=f"dt_s_{sel_pid}", placeholder="全部供应商")
+                latest_only = f3.toggle("仅看最新报价", key=f"dt_l_{sel_pid}")
+                view = filter_bids(df, sel_prods, sel_sups, latest_only)
+                # 选中状态按行位置保存：数据版本或筛选条件变化时换 key 清空选中，已选报价按序号记住，新报价插到顶部也不会错位
+                grid_key = f"bid_grid_{sel_pid}_{pdata.get('version', 0)}_{hashlib.md5(repr((sel_prods, sel_sups, latest_only)).encode()).hexdigest()[:8]}"
+                event = st.dataframe(
+                    view[["seq", "product", "supplier", "price", "quantity", "line_total", "remark", "ts", "file_name"]],
+                    use_container_width=True, hide_index=True, height=420, key=grid_key,
+                    on_select="rerun", selection_mode="single-row",
+                    column_config={
+                        "seq": st.column_config.NumberColumn("序号", format="%d"), "product": "产品", "supplier": "供应商",
+                        "price": st.column_config.NumberColumn("单价", format="¥%.2f"), "quantity": "数量",
+                        "line_total": st.column_config.NumberColumn("小计", format="¥%.2f"), "remark": "备注",
+                        "ts": st.column_config.DatetimeColumn("时间", format="MM-DD HH:mm:ss"), "file_name": "附件"
+                    })
+                rows = [r for r in (event.selection.rows if event else []) if 0 <= r < len(view)]
+                picked_key = f"bid_pick_{sel_pid}"
+                if rows: st.session_state[picked_key] = (grid_key, int(view.iloc[rows[0]]["seq"]))
+                elif st.session_state.get(picked_key, ("", None))[0] == grid_key: st.session_state.pop(picked_key)  # 同一视图内取消了选中
+                picked = view[view["seq"] == st.session_state.get(picked_key, ("", None))[1]]
+                if not picked.empty:
+                    row = picked.iloc[0]
+                    if row["file_hash"]:
+                        render_attachment({"name": row["file_name"], "type": row["file_type"], "hash": row["file_hash"]},
+                                          f"dl_bid_{sel_pid}_{row['seq']}", f"{row['supplier']} · {row['product']}")
+                    else: st.caption("该报价无附件")
+                else: st.caption("选中一行可下载该报价的附件")
+
+    # ================= 归档库 =================
+    elif menu == "归档库":
+        st.subheader("📦 归档项目")
+        st.caption(f"截止超过 {ARCHIVE_GRACE_DAYS:g} 天的项目会自动归档（压缩包：`{ARCHIVE_DIR}`），归档内容只读，可恢复为在线项目")
+        archives = global_data.get("archives", {})
+        if not archives: st.info("暂无归档项目")
+        else:
+            kw = st.text_input("搜索归档", placeholder="🔍 按项目名称搜索", label_visibility="collapsed").strip().lower()
+            rows = sorted(([pid, m] for pid, m in list(archives.items()) if not kw or kw in m["name"].lower()),
+                          key=lambda r: deadline_ts(r[1]["deadline"]), reverse=True)
+            event = st.dataframe(pd.DataFrame([{
+                "项目": m["name"], "截止时间": m["deadline"], "产品数": m["products"], "供应商数": m["suppliers"],
+                "报价数": m["bids"], "归档大小(KB)": round(m["size"] / 1024, 1), "归档时间": m["archived_at"]
+            } for _, m in rows]), use_container_width=True, hide_index=True, key="arc_grid", on_select="rerun", selection_mode="single-row")
+            sel = event.selection.rows if event else []
+            if sel and sel[0] < len(rows):
+                arc_pid = rows[sel[0]][0]
+                if not os.path.exists(archive_path(arc_pid)): st.error("归档文件不存在")
+                else:
+                    adata = load_archive(arc_pid, os.path.getmtime(archive_path(arc_pid)))
+                    with st.container(border=True):
+                        st.markdown(f"#### {adata['name']}")
+                        st.dataframe(pd.DataFrame([product_summary(pn, pinfo) for pn, pinfo in adata.get("products", {}).items()]),
+                                     use_container_width=True, hide_index=True)
+                        for pn, pinfo in adata.get("products", {}).items():
+                            f = pinfo.get("admin_file")
+                            if isinstance(f, dict) and f.get("hash"):
+                                st.download_button(f"📎 规格书 · {pn} {f['name']}", data=lambda h=f["hash"]: read_archive_blob(arc_pid, h), file_name=f["name"],
+                                                   mime=f.get("type") or "application/octet-stream", key=f"arc_spec_{arc_pid}_{pn}",
+                                                   on_click="ignore", type="tertiary")
+                        adf = build_bid_frame(adata)
+                        if not adf.empty:
+                            arc_event = st.dataframe(adf.assign(line_total=adf["price"] * adf["quantity"])[["seq", "product", "supplier", "price", "quantity", "line_total", "remark", "ts", "file_name"]].rename(columns={
+                                "seq": "序号", "product": "产品", "supplier": "供应商", "price": "单价", "quantity": "数量",
+                                "line_total": "小计", "remark": "备注", "ts": "时间", "file_name": "附件"
+                            }), use_container_width=True, hide_index=True, height=320, key=f"arc_bids_{arc_pid}", on_select="rerun", selection_mode="single-row")
+                            # 与报价明细相同：选中一行才提供该报价的附件下载
+                            picked = [i for i in (arc_event.selection.rows if arc_event else []) if 0 <= i < len(adf)]
+                            if not picked: st.caption("选中一行可下载该报价的附件")
+                            elif pd.notna(adf.iloc[picked[0]]["file_hash"]):
+                                r = adf.iloc[picked[0]]
+                                st.download_button(f"📎 {r['supplier']} · {r['product']} {r['file_name']}",
+                                                   data=lambda h=r["file_hash"]: read_archive_blob(arc_pid, h), file_name=r["file_name"],
+                                                   mime=r["file_type"] or "application/octet-stream", key=f"arc_dl_{arc_pid}_{r['seq']}",
+                                                   on_click="ignore", type="tertiary")
+                            else: st.caption("该报价无附件")
+                        if st.button("♻️ 恢复为在线项目", key=f"restore_{arc_pid}", type="primary"):
+                            if restore_project(arc_pid): st.success("已恢复，可在「项目管理」中查看"); st.rerun()
+                            else: st.error("同名项目已在线，无法恢复")
+            else: st.caption("选中一行查看归档详情")
+
+    # ================= 系统状态 =================
+    elif menu == "系统状态":
+        st.subheader("🩺 系统状态")
+        m = get_metrics()
+        if st.button("🔄 立即重新统计") or not m["memory"]: export_metrics()
+        with m["lock"]:
+            hists = {k: dict(v) for k, v in m["hists"].items()}
+            counters, memory, exported_at = dict(m["counters"]), dict(m["memory"]), m["exported_at"]
+        mb = lambda b: f"{(b or 0) / 1024 / 1024:,.1f} MB" if (b or 0) >= 1024 * 1024 else f"{(b or 0) / 1024:,.1f} KB"
+        c1, c2, c3, c4 = st.columns(4)
+        c1.metric("进程峰值内存", mb(max_rss_bytes()))
+        c2.metric("数据总占用", mb(memory.get("total")), help="global_data 递归估算")
+        c3.metric("登录次数/秒", f"{rate('login_attempt'):.2f}", help=f"最近 {RATE_WINDOW} 秒平均")
+        c4.metric("报价条数/秒", f"{rate('bid_accepted'):.2f}", help=f"最近 {RATE_WINDOW} 秒平均")
+        st.markdown("#### 💾 内存拆分")
+        st.dataframe(pd.DataFrame([
+            {"类别": "项目结构", "占用": mb(memory.get("projects"))},
+            {"类别": "报价记录", "占用": mb(memory.get("bids"))},
+            {"类别": "索引与供应商库", "占用": mb(memory.get("indexes"))},
+            {"类别": f"附件正文（{memory.get('attachment_files', 0)} 个，磁盘）", "占用": mb(memory.get("attachments"))},
+            {"类别": "附件库目录（磁盘）", "占用": mb(memory.get("blob_store"))},
+        ]), use_container_width=True, hide_index=True)
+        st.markdown("#### ⏱️ 耗时")
+        st.dataframe(pd.DataFrame([{
+            "操作": label, "次数": h["count"], "平均(ms)": round(h["sum"] / h["count"] * 1000, 1),
+            "P95(ms)": round(hist_quantile(h, 0.95) * 1000, 1), "最大(ms)": round(h["max"] * 1000, 1)
+        } for (fam, label), h in sorted(hists.items()) if fam == "duration_seconds" and h["count"]]), use_container_width=True, hide_index=True)
+        st.markdown("#### 🧩 每次重跑控件数")
+        st.dataframe(pd.DataFrame([{
+            "页面": label, "重跑次数": h["count"], "平均": round(h["sum"] / h["count"], 1), "P95": hist_quantile(h, 0.95), "最大": int(h["max"])
+        } for (fam, label), h in sorted(hists.items()) if fam == "widgets_per_rerun" and h["count"]]), use_container_width=True, hide_index=True)
+        st.markdown("#### 🗂️ 附件缓存")
+        bc = blob_cache_stats()
+        b1, b2, b3, b4 = st.columns(4)
+        b1.metric("命中率", f"{bc['hits'] / max(1, bc['hits'] + bc['misses']):.0%}", help=f"命中 {bc['hits']} / 未命中 {bc['misses']}")
+        b2.metric("已缓存", f"{bc['files']} 个")
+        b3.metric("占用 / 容量", f"{mb(bc['bytes'])} / {mb(bc['capacity'])}")
+        b4.metric("淘汰次数", bc["evictions"])
+        st.markdown("#### 🔢 计数")
+        st.dataframe(pd.DataFrame([{"事件": k, "累计": v} for k, v in sorted(counters.items())]), use_container_width=True, hide_index=True)
+        st.markdown("#### 📤 Prometheus 导出")
+        st.caption(f"每 {METRICS_INTERVAL} 秒写入 `{METRICS_FILE}`" + (f"，最近一次：{exported_at:%H:%M:%S}" if exported_at else ""))
+        st.download_button("下载当前指标", data=prometheus_text(), file_name="metrics.prom", mime="text/plain", on_click="ignore")
@@ -0,0 +1,70 @@
+import streamlit as st
+import pandas as pd
+import numpy as np
+from huamai.state import global_data
+
+# --- 报价分析（列式报价表 + 向量化计算） ---
+@st.cache_data(max_entries=32, show_spinner=False)
+def bid_frame(pid, version):
+    # 按项目版本缓存；附件只保留哈希和文件名，不带文件内容
+    return build_bid_frame(global_data["projects"].get(pid, {}))
+
+def build_bid_frame(pdata):
+    cols = {k: [] for k in ("product", "supplier", "price", "quantity", "seq", "ts", "remark", "file_hash", "file_name", "file_type")}
+    for pn, p_info in list(pdata.get("products", {}).items()):
+        bids = list(p_info.get("bids", []))
+        cols["product"] += [pn] * len(bids)
+        cols["quantity"] += [p_info["quantity"]] * len(bids)
+        for b in bids:
+            f = b.get("file") or {}
+            cols["supplier"].append(b["supplier"]); cols["price"].append(b["price"])
+            cols["seq"].append(b.get("seq", 0)); cols["ts"].append(b.get("datetime"))
+            cols["remark"].append(b.get("remark", "")); cols["file_hash"].append(f.get("hash")); cols["file_name"].append(f.get("name")); cols["file_type"].append(f.get("type"))
+    return pd.DataFrame({
+        "product": pd.Categorical(cols["product"]), "supplier": pd.Categorical(cols["supplier"]),
+        "price": np.asarray(cols["price"], dtype="float64"), "quantity": np.asarray(cols["quantity"], dtype="int64"),
+        "seq": np.asarray(cols["seq"], dtype="int64"), "ts": pd.to_datetime(cols["ts"]),
+        "remark": cols["remark"], "file_hash": cols["file_hash"], "file_name": cols["file_name"], "file_type": cols["file_type"]
+    })
+
+def latest_bids(df):
+    # 每个供应商在每个产品上的最新有效报价，并给出产品内名次
+    latest = df[df["price"] > 0].sort_values("seq").drop_duplicates(["product", "supplier"], keep="last")
+    latest = latest.assign(line_total=latest["price"] * latest["quantity"],
+                           rank=latest.groupby("product", observed=True)["price"].rank(method="min").astype("int64"),
+                           vs_median=latest["price"] / latest.groupby("product", observed=True)["price"].transform("median") - 1)
+    return latest.sort_values(["product", "rank"]).reset_index(drop=True)
+
+def supplier_totals(latest, n_products):
+    g = latest.assign(is_first=latest["rank"] == 1).groupby("supplier", observed=True)
+    out = g.agg(quoted=("product", "nunique"), total=("line_total", "sum"), firsts=("is_first", "sum"))
+    out["coverage"] = out["quoted"] / max(n_products, 1)
+    return out.sort_values(["quoted", "total"], ascending=[False, True]).reset_index()
+
+def min_cost_award(latest):
+    # 分项授标：每个产品取最低价供应商
+    return latest.loc[latest.groupby("product", observed=True)["price"].idxmin(),
+                      ["product", "supplier", "price", "quantity", "line_total"]].reset_index(drop=True)
+
+def price_spread(latest):
+    g = latest.groupby("product", observed=True)["price"]
+    out = g.agg(["count", "min", "median", "max"])
+    out["p25"], out["p75"] = g.quantile(0.25), g.quantile(0.75)
+    out["spread"] = (out["max"] - out["min"]) / out["median"]
+    return out.reset_index()
+
+def filter_bids(df, products=(), suppliers=(), latest_only=False):
+    view = df
+    if products: view = view[view["product"].isin(products)]
+    if suppliers: view = view[view["supplier"].isin(suppliers)]
+    if latest_only: view = view.sort_values("seq").drop_duplicates(["product", "supplier"], keep="last")
+    return view.assign(line_total=view["price"] * view["quantity"]).sort_values("seq", ascending=False).reset_index(drop=True)
+
+def bid_trend(df):
+    # 按时间的累计报价数（各产品单价不可比，最低价走势见 product_trend）
+    valid = df[df["price"] > 0].sort_values("seq")
+    return pd.DataFrame({"累计报价数": np.arange(1, len(valid) + 1)}, index=valid["ts"].values)
+
+def product_trend(df, product):
+    valid = df[(df["product"] == product) & (df["price"] > 0)].sort_values("seq")
+    return pd.DataFrame({"最低单价": valid["price"].cummin().values}, index=valid["ts"].values)
@@ -0,0 +1,111 @@
+import streamlit as st
+import os
+import tempfile
+import zipfile
+import threading
+from bisect import bisect_right
+from datetime import datetime
+import time
+from huamai.metrics import incr
+from huamai.storage import DATA_DIR, blob_path, put_blob_stream
+from huamai.state import get_lock, global_data, dumps, transact, loads, make_cred, project_copy
+
+# --- 项目归档（截止超过宽限期的项目连同报价、附件压缩成归档文件，移出热数据） ---
+ARCHIVE_DIR = os.path.join(DATA_DIR, "archive")
+ARCHIVE_GRACE_DAYS = float(os.environ.get("HUAMAI_ARCHIVE_GRACE_DAYS", "30"))
+ARCHIVE_INTERVAL = int(os.environ.get("HUAMAI_ARCHIVE_INTERVAL", "3600"))
+BLOB_GC_MIN_AGE = 3600
+
+def archive_path(pid):
+    return os.path.join(ARCHIVE_DIR, f"{pid}.zip")
+
+def project_blob_hashes(pdata):
+    hashes = set()
+    for p_info in pdata.get("products", {}).values():
+        for f in [p_info.get("admin_file")] + [b.get("file") for b in p_info.get("bids", [])]:
+            if isinstance(f, dict) and f.get("hash"): hashes.add(f["hash"])
+    return hashes
+
+def archive_project(pid):
+    # 锁内只取项目副本，序列化和写压缩包都在锁外；提交时核对版本号，期间项目有变更则放弃，下一轮再归档
+    version, pdata = project_copy(pid)
+    if pdata is None: return False
+    text, hashes = dumps(pdata), project_blob_hashes(pdata)
+    os.makedirs(ARCHIVE_DIR, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=ARCHIVE_DIR, prefix=".arc_")
+    os.close(fd)
+    try:
+        with zipfile.ZipFile(tmp, "w", zipfile.ZIP_DEFLATED, strict_timestamps=False) as zf:
+            zf.writestr("project.json", text)
+            for h in hashes:
+                if os.path.exists(blob_path(h)): zf.write(blob_path(h), f"blobs/{h}")
+        def build():
+            pdata = global_data["projects"].get(pid)
+            if pdata is None or pdata.get("version", 0) != version: return None, None, False
+            if os.path.exists(tmp): os.replace(tmp, archive_path(pid))
+            meta = {"name": pdata["name"], "deadline": pdata["deadline"], "archived_at": datetime.now(),
+                    "products": len(pdata.get("products", {})), "suppliers": len(pdata.get("codes", {})),
+                    "bids": sum(len(p_info.get("bids", [])) for p_info in pdata.get("products", {}).values()),
+                    "size": os.path.getsize(archive_path(pid))}
+            return "project_archive", {"pid": pid, "meta": meta}, True
+        with get_lock(f"project:{pid}"): archived, _ = transact(build)
+    finally:
+        if os.path.exists(tmp): os.remove(tmp)
+    if not archived: return False
+    gc_blobs(hashes)
+    incr("project_archived")
+    return True
+
+def gc_blobs(hashes):
+    # 只删除已无在线项目引用、且近期未被上传复用的附件；归档包里各自留有一份
+    with get_lock("journal"):
+        live = set()
+        for pdata in global_data["projects"].values(): live |= project_blob_hashes(pdata)
+    for h in hashes - live:
+        path = blob_path(h)
+        try:
+            if time.time() - os.path.getmtime(path) > BLOB_GC_MIN_AGE: os.remove(path)
+        except OSError: pass
+
+def restore_project(pid):
+    path = archive_path(pid)
+    with zipfile.ZipFile(path) as zf:
+        pdata = loads(zf.read("project.json").decode("utf-8"))
+        for name in zf.namelist():
+            if name.startswith("blobs/") and not os.path.exists(blob_path(name[len("blobs/"):])):
+                with zf.open(name) as f: put_blob_stream(f)
+    def build():
+        if pid in global_data["projects"]: return None, None, False
+        return "project_restore", {"pid": pid, "project": pdata,
+                                   "creds": {s: make_cred(global_data, s, c) for s, c in pdata.get("codes", {}).items()}}, True
+    with get_lock(f"project:{pid}"): restored, _ = transact(build)
+    if restored and os.path.exists(path): os.remove(path)
+    return restored
+
+def archive_candidates(now=None):
+    # 截止时间早于 now - 宽限期 的项目，在按截止时间排序的索引上二分取前缀
+    cutoff = (now or datetime.now()).timestamp() - ARCHIVE_GRACE_DAYS * 86400
+    index = global_data["proj_index"]
+    return [pid for _, pid in index[:bisect_right(index, cutoff, key=lambda e: e[0])]
+            if not global_data["projects"].get(pid, {}).get("archive_hold")]
+
+@st.cache_resource
+def start_archiver():
+    def loop():
+        while True:
+            for pid in archive_candidates():
+                try: archive_project(pid)
+                except Exception: incr("project_archive_failed")
+            time.sleep(ARCHIVE_INTERVAL)
+    if ARCHIVE_GRACE_DAYS < 0: return None  # 宽限期设为负数即关闭自动归档
+    t = threading.Thread(target=loop, daemon=True, name="archiver")
+    t.start()
+    return t
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def load_archive(pid, mtime):
+    # 归档浏览时才读取，按文件修改时间缓存
+    with zipfile.ZipFile(archive_path(pid)) as zf: return loads(zf.read("project.json").decode("utf-8"))
+
+def read_archive_blob(pid, digest):
+    with zipfile.ZipFile(archive_path(pid)) as zf: return zf.read(f"blobs/{digest}")
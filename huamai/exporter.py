@@ -0,0 +1,101 @@
+import streamlit as st
+import os
+import atexit
+import tempfile
+import threading
+from datetime import datetime
+import time
+from huamai.metrics import deep_sizeof, dir_size, get_metrics, max_rss_bytes, incr
+from huamai.storage import DATA_DIR, BLOB_DIR, blob_cache_stats
+from huamai.state import global_data
+
+# --- 指标导出（内存统计 + 定期写出 Prometheus 文本文件） ---
+# 多个工作进程各写各的文件（textfile 采集器会合并目录下全部 *.prom），并给每条指标加 worker 标签
+WORKER_ID = os.environ.get("HUAMAI_WORKER_ID") or str(os.getpid())
+_metrics_root, _metrics_ext = os.path.splitext(os.environ.get("HUAMAI_METRICS_FILE", os.path.join(DATA_DIR, "metrics.prom")))
+METRICS_FILE = f"{_metrics_root}-{WORKER_ID}{_metrics_ext or '.prom'}"
+METRICS_INTERVAL = int(os.environ.get("HUAMAI_METRICS_INTERVAL", "15"))
+
+def memory_report():
+    # global_data 内存拆分：报价先计，项目结构不再重复计入报价；附件只有元数据在内存，正文按哈希去重后统计
+    seen, bids_b, projects_b, attach = set(), 0, 0, {}
+    for pdata in list(global_data["projects"].values()):
+        for p_info in list(pdata.get("products", {}).values()):
+            bids = list(p_info.get("bids", []))
+            bids_b += deep_sizeof(p_info.get("bids", []), seen)
+            for f in [p_info.get("admin_file")] + [b.get("file") for b in bids]:
+                if isinstance(f, dict) and f.get("hash"): attach[f["hash"]] = f.get("size", 0)
+        projects_b += deep_sizeof(pdata, seen)
+    other_b = deep_sizeof(global_data, seen)
+    return {"projects": projects_b, "bids": bids_b, "indexes": other_b, "total": projects_b + bids_b + other_b,
+            "attachments": sum(attach.values()), "attachment_files": len(attach), "blob_store": dir_size(BLOB_DIR)}
+
+def prometheus_text():
+    m = get_metrics()
+    with m["lock"]:
+        hists = {k: dict(v, counts=list(v["counts"])) for k, v in m["hists"].items()}
+        counters, memory = dict(m["counters"]), dict(m["memory"])
+    lines = []
+    for family, label_name, help_text in (("duration_seconds", "op", "耗时（秒）"), ("widgets_per_rerun", "view", "单次重跑的控件数")):
+        lines += [f"# HELP huamai_{family} {help_text}", f"# TYPE huamai_{family} histogram"]
+        for (fam, label), h in sorted(hists.items()):
+            if fam != family: continue
+            acc = 0
+            for le, c in zip(h["buckets"], h["counts"]):
+                acc += c
+                lines.append(f'huamai_{family}_bucket{{{label_name}="{label}",le="{le}"}} {acc}')
+            lines.append(f'huamai_{family}_bucket{{{label_name}="{label}",le="+Inf"}} {h["count"]}')
+            lines.append(f'huamai_{family}_sum{{{label_name}="{label}"}} {h["sum"]:.6f}')
+            lines.append(f'huamai_{family}_count{{{label_name}="{label}"}} {h["count"]}')
+    lines += ["# HELP huamai_events_total 事件计数", "# TYPE huamai_events_total counter"]
+    lines += [f'huamai_events_total{{event="{k}"}} {v}' for k, v in sorted(counters.items())]
+    lines += ["# HELP huamai_memory_bytes 内存与附件占用（字节）", "# TYPE huamai_memory_bytes gauge"]
+    lines += [f'huamai_memory_bytes{{part="{k}"}} {v}' for k, v in memory.items() if k != "attachment_files"]
+    lines += ["# TYPE huamai_attachment_files gauge", f'huamai_attachment_files {memory.get("attachment_files", 0)}']
+    bc = blob_cache_stats()
+    lines += ["# HELP huamai_blob_cache_requests_total 附件缓存命中/未命中", "# TYPE huamai_blob_cache_requests_total counter",
+              f'huamai_blob_cache_requests_total{{result="hit"}} {bc["hits"]}', f'huamai_blob_cache_requests_total{{result="miss"}} {bc["misses"]}',
+              "# TYPE huamai_blob_cache_evictions_total counter", f'huamai_blob_cache_evictions_total {bc["evictions"]}',
+              "# TYPE huamai_blob_cache_bytes gauge", f'huamai_blob_cache_bytes {bc["bytes"]}',
+              "# TYPE huamai_blob_cache_capacity_bytes gauge", f'huamai_blob_cache_capacity_bytes {bc["capacity"]}']
+    lines += ["# TYPE huamai_process_max_rss_bytes gauge", f"huamai_process_max_rss_bytes {max_rss_bytes() or 0}"]
+    return "\n".join(l if l.startswith("#") else _with_worker(l) for l in lines) + "\n"
+
+def _with_worker(line):
+    name, value = line.split(" ", 1)
+    worker = f'worker="{WORKER_ID}"'
+    return f"{name.replace('{', '{' + worker + ',', 1)} {value}" if "{" in name else f"{name}{{{worker}}} {value}"
+
+def export_metrics():
+    # 内存统计需要遍历全部数据，只在后台线程里定期做；写临时文件后原子替换
+    m = get_metrics()
+    try: report = memory_report()
+    except RuntimeError: report = None  # 遍历期间数据被并发修改，下个周期再算
+    with m["lock"]:
+        if report: m["memory"] = report
+        m["exported_at"] = datetime.now()
+    folder = os.path.dirname(METRICS_FILE) or "."
+    os.makedirs(folder, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=folder, prefix=".metrics_", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f: f.write(prometheus_text())
+        os.replace(tmp, METRICS_FILE)
+    finally:
+        if os.path.exists(tmp): os.remove(tmp)
+
+def remove_metrics_file():
+    # 进程退出时删除本进程的文件，避免采集器继续读到已退出进程的旧指标
+    try: os.remove(METRICS_FILE)
+    except FileNotFoundError: pass
+
+@st.cache_resource
+def start_metrics_exporter():
+    def loop():
+        while True:
+            try: export_metrics()
+            except Exception: incr("metrics_export_failed")
+            time.sleep(METRICS_INTERVAL)
+    atexit.register(remove_metrics_file)
+    t = threading.Thread(target=loop, daemon=True, name="metrics-exporter")
+    t.start()
+    return t
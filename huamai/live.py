@@ -0,0 +1,34 @@
+import streamlit as st
+import streamlit.components.v1 as components
+
+# --- 局部实时刷新 ---
+LIVE_REFRESH_SECONDS = 3
+
+@st.fragment(run_every=LIVE_REFRESH_SECONDS)
+def live_watch(state_key, probe):
+    # 只重跑这个空片段做轻量检查，数据确实变化时才整页重跑
+    if probe() != st.session_state.get(state_key): st.rerun()
+
+def start_live_watch(state_key, probe):
+    st.session_state[state_key] = probe()
+    live_watch(state_key, probe)
+
+def render_countdown(deadline):
+    # 倒计时在浏览器端走秒；截止与否以服务器提交时刻为准
+    # 新版 Streamlit 用 st.iframe 取代了 components.html，旧版本仍回退到后者
+    embed = getattr(st, "iframe", None) or components.html
+    embed(f"""
+    <div id="cd" style="text-align:right; font-weight:bold; font-size:1.2em; color:#10b981;
+                        font-family:'Source Sans Pro','Microsoft YaHei',sans-serif; padding-top:6px;"></div>
+    <script>
+        const end = {int(deadline.timestamp() * 1000)}, el = document.getElementById("cd");
+        const pad = n => String(n).padStart(2, "0");
+        function tick() {{
+            const left = Math.floor((end - Date.now()) / 1000);
+            if (left <= 0) {{ el.style.color = "#ef4444"; el.textContent = "🚫 报价已截止"; return; }}
+            const d = Math.floor(left / 86400), h = Math.floor(left % 86400 / 3600);
+            el.textContent = "⏳ 剩余时间: " + (d ? d + "天 " : "") + h + ":" + pad(Math.floor(left % 3600 / 60)) + ":" + pad(left % 60);
+            setTimeout(tick, 1000);
+        }}
+        tick();
+    </script>""", height=44)
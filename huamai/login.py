@@ -0,0 +1,42 @@
+import streamlit as st
+from datetime import datetime
+from huamai.metrics import timed, incr
+from huamai.state import lookup_credentials, safe_parse_deadline, global_data
+
+# --- 登录页面 ---
+@timed("render_login_page")
+def render_login_page():
+    st.markdown("<br><br>", unsafe_allow_html=True)
+    col1, col2, col3 = st.columns([1, 1.2, 1])
+    with col2:
+        st.markdown('<div class="ui-card">', unsafe_allow_html=True)
+        st.markdown("<h2 style='text-align: center; color: #1e293b; margin-top:0;'>🔐 华脉招采平台</h2>", unsafe_allow_html=True)
+        st.markdown("<div style='text-align: center; color: #64748b; font-size: 0.9em; margin-bottom: 20px;'>专业 · 高效 · 透明</div>", unsafe_allow_html=True)
+        
+        username = st.text_input("用户名", placeholder="请输入用户名").strip()
+        password = st.text_input("密码", type="password", placeholder="请输入密码").strip()
+        
+        st.markdown("<br>", unsafe_allow_html=True)
+        
+        if st.button("立即登录", type="primary", use_container_width=True):
+            incr("login_attempt")
+            if username == "HUAMAI" and password == "HUAMAI888":
+                st.session_state["user_type"] = "admin"
+                st.session_state["user"] = username
+                st.rerun()
+            else:
+                pids = lookup_credentials(username, password)
+                if pids:
+                    # 同一供应商参与多个项目时，优先进入未截止且最早截止的项目
+                    now = datetime.now()
+                    pids.sort(key=lambda x: (safe_parse_deadline(global_data["projects"][x].get("deadline")) < now,
+                                             safe_parse_deadline(global_data["projects"][x].get("deadline"))))
+                    st.session_state["user_type"] = "supplier"
+                    st.session_state["user"] = username
+                    st.session_state["project_ids"] = pids
+                    st.session_state["project_id"] = pids[0]
+                    st.rerun()
+                else:
+                    incr("login_failure")
+                    st.error("❌ 用户名或密码错误")
+        st.markdown('</div>', unsafe_allow_html=True)
@@ -0,0 +1,98 @@
+import streamlit as st
+import os
+import threading
+import functools
+import sys
+from collections import deque
+from bisect import bisect_left, bisect_right
+import time
+
+# --- 运行指标（耗时直方图 + 计数器，各模块共用） ---
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+WIDGET_BUCKETS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+RATE_WINDOW = 60
+
+@st.cache_resource
+def get_metrics():
+    # 进程内共享：所有会话与后台线程写同一份
+    return {"lock": threading.Lock(), "hists": {}, "counters": {}, "events": {}, "memory": {}, "exported_at": None}
+
+def observe(family, label, value, buckets=LATENCY_BUCKETS):
+    m = get_metrics()
+    with m["lock"]:
+        h = m["hists"].get((family, label))
+        if h is None: h = m["hists"][(family, label)] = {"buckets": buckets, "counts": [0] * len(buckets), "count": 0, "sum": 0.0, "max": 0.0}
+        i = bisect_left(h["buckets"], value)
+        if i < len(h["counts"]): h["counts"][i] += 1
+        h["count"] += 1; h["sum"] += value; h["max"] = max(h["max"], value)
+
+def incr(event, n=1):
+    m = get_metrics()
+    now = time.time()
+    with m["lock"]:
+        m["counters"][event] = m["counters"].get(event, 0) + n
+        q = m["events"].get(event)
+        if q is None: q = m["events"][event] = deque(maxlen=100000)
+        q.extend([now] * n)
+
+def rate(event, window=RATE_WINDOW):
+    # 最近 window 秒内的平均每秒次数
+    m = get_metrics()
+    cutoff = time.time() - window
+    with m["lock"]: q = list(m["events"].get(event, ()))
+    return (len(q) - bisect_right(q, cutoff)) / window
+
+def hist_quantile(h, q):
+    # 按分桶估算分位数（取所在桶的上界），落在最后一个桶之外时取最大值
+    target, acc = q * h["count"], 0
+    for le, c in zip(h["buckets"], h["counts"]):
+        acc += c
+        if acc >= target: return min(le, h["max"])
+    return h["max"]
+
+def timed(name):
+    def wrap(fn):
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            t0 = time.perf_counter()
+            try: return fn(*args, **kwargs)
+            finally: observe("duration_seconds", name, time.perf_counter() - t0)
+        return inner
+    return wrap
+
+def widgets_this_run():
+    # Streamlit 内部接口，各版本位置不同；取不到时返回 None
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        ctx = get_script_run_ctx()
+        ids = getattr(getattr(ctx, "shared", None), "widget_ids_this_run", None)
+        if ids is None: ids = getattr(ctx, "widget_ids_this_run", None)
+        if ids is None: return None
+        return len(ids.snapshot()) if hasattr(ids, "snapshot") else len(ids)
+    except Exception:
+        return None
+
+def deep_sizeof(obj, seen):
+    # 递归估算对象图字节数，seen 中已计过的共享对象不重复计算
+    if id(obj) in seen: return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict): size += sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)): size += sum(deep_sizeof(v, seen) for v in obj)
+    return size
+
+def dir_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for f in files:
+            try: total += os.path.getsize(os.path.join(root, f))
+            except OSError: pass
+    return total
+
+def max_rss_bytes():
+    try:
+        import resource
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return rss if sys.platform == "darwin" else rss * 1024
+    except ImportError:
+        return None
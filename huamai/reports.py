@@ -0,0 +1,140 @@
+import streamlit as st
+import pandas as pd
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from huamai.storage import DATA_DIR
+from huamai.state import global_data, get_lock, project_copy
+from huamai.analytics import build_bid_frame, latest_bids, min_cost_award, supplier_totals
+
+# --- 比价报告（后台线程生成，按项目版本缓存为磁盘文件） ---
+REPORT_DIR = os.path.join(DATA_DIR, "reports")
+REPORT_KINDS = {"xlsx": ("📊 Excel 比价矩阵", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+                "docx": ("📝 Word 授标汇总", "application/vnd.openxmlformats-officedocument.wordprocessingml.document")}
+
+@st.cache_resource
+def get_report_pool():
+    return ThreadPoolExecutor(max_workers=2, thread_name_prefix="report")
+
+@st.cache_resource
+def get_report_jobs():
+    # (项目, 类型) -> (版本, 任务)；每个项目每类报告只保留最近一次请求
+    return {}
+
+def report_path(pid, version, kind):
+    return os.path.join(REPORT_DIR, f"{pid}_v{version}.{kind}")
+
+def report_versions(pid, kind):
+    # 该项目已生成的报告版本号
+    prefix, suffix = f"{pid}_v", f".{kind}"
+    names = os.listdir(REPORT_DIR) if os.path.isdir(REPORT_DIR) else []
+    return [int(n[len(prefix):-len(suffix)]) for n in names if n.startswith(prefix) and n.endswith(suffix) and n[len(prefix):-len(suffix)].isdigit()]
+
+def latest_report(pid, kind):
+    # 已生成的最新版本报告，返回 (版本, 文件路径)，没有时为 (None, None)
+    versions = report_versions(pid, kind)
+    if not versions: return None, None
+    return max(versions), report_path(pid, max(versions), kind)
+
+def report_status(pid, kind):
+    # 只读，不触发生成。返回 (状态, 已有报告的版本, 文件路径)：
+    # ready 为当前版本已生成；pending 生成中；failed 上次生成失败；stale 只有旧版本；none 从未生成
+    pdata = global_data["projects"].get(pid)
+    if not pdata: return "missing", None, None
+    version = pdata.get("version", 0)
+    v, path = latest_report(pid, kind)
+    if v == version: return "ready", v, path
+    job = get_report_jobs().get((pid, kind))
+    if job and job[0] == version:
+        if not job[1].done(): return "pending", v, path
+        if job[1].exception(): return "failed", v, path
+    return ("stale" if path else "none"), v, path
+
+def request_report(pid, kind):
+    # 管理员点击生成时调用：取当前版本的项目副本提交一次生成任务，同时丢弃该项目旧版本的任务记录
+    version, pdata = project_copy(pid)
+    if pdata is None: return
+    with get_lock("reports"):
+        jobs = get_report_jobs()
+        job = jobs.get((pid, kind))
+        if job and job[0] == version and not (job[1].done() and job[1].exception()): return
+        if os.path.exists(report_path(pid, version, kind)): return
+        jobs[(pid, kind)] = (version, get_report_pool().submit(write_report, pid, version, kind, pdata))
+
+def read_report(pid, version, kind):
+    # 点击下载时才读取；该版本若已被更新的报告替换，则返回最新一份
+    for path in (report_path(pid, version, kind), latest_report(pid, kind)[1]):
+        if not path: continue
+        try:
+            with open(path, "rb") as f: return f.read()
+        except FileNotFoundError: continue
+    return b""
+
+def write_report(pid, version, kind, pdata):
+    # pdata 为请求时取得的该版本副本，文件内容与文件名中的版本一致
+    df = build_bid_frame(pdata)
+    os.makedirs(REPORT_DIR, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=REPORT_DIR, prefix=".rpt_")
+    os.close(fd)
+    try:
+        (write_xlsx_report if kind == "xlsx" else write_docx_report)(tmp, pdata, df)
+        os.replace(tmp, report_path(pid, version, kind))
+    finally:
+        if os.path.exists(tmp): os.remove(tmp)
+    # 清理该项目更早版本的报告（较慢的旧任务不会删掉已生成的新版本）
+    for v in report_versions(pid, kind):
+        if v >= version: continue
+        try: os.remove(report_path(pid, v, kind))
+        except FileNotFoundError: pass
+
+def write_xlsx_report(path, pdata, df):
+    from openpyxl import Workbook
+    # write_only 模式逐行写出，不在内存中保留整张表
+    wb = Workbook(write_only=True)
+    latest = latest_bids(df)
+    suppliers = sorted(latest["supplier"].unique()) if not latest.empty else []
+    matrix = latest.pivot_table(index="product", columns="supplier", values="price", observed=True) if not latest.empty else None
+    ws = wb.create_sheet("比价矩阵")
+    ws.append(["产品", "数量", "描述"] + list(suppliers) + ["最低单价", "推荐供应商", "最低总价"])
+    # 最低单价 / 推荐供应商与矩阵、分项授标同取各供应商最新报价
+    for pn, p_info in list(pdata.get("products", {}).items()):
+        prices = [None if matrix is None or pn not in matrix.index or pd.isna(matrix.at[pn, s]) else float(matrix.at[pn, s]) for s in suppliers]
+        low = min((x for x in prices if x is not None), default=None)
+        best = [s for s, x in zip(suppliers, prices) if low is not None and x == low]
+        ws.append([pn, p_info["quantity"], p_info.get("desc", "")] + prices + [low, ",".join(best), low * p_info["quantity"] if low else None])
+    ws = wb.create_sheet("分项授标")
+    ws.append(["产品", "供应商", "单价", "数量", "小计"])
+    if not latest.empty:
+        for row in min_cost_award(latest).itertuples(index=False):
+            ws.append([row.product, row.supplier, float(row.price), int(row.quantity), float(row.line_total)])
+    ws = wb.create_sheet("报价明细")
+    ws.append(["序号", "产品", "供应商", "单价", "备注", "时间", "附件"])
+    for row in df.sort_values("seq").itertuples(index=False):
+        ws.append([int(row.seq), row.product, row.supplier, float(row.price), row.remark, row.ts.to_pydatetime() if pd.notna(row.ts) else None, row.file_name])
+    wb.save(path)
+
+def write_docx_report(path, pdata, df):
+    from docx import Document
+    doc = Document()
+    doc.add_heading(f"比价授标汇总 - {pdata['name']}", level=1)
+    doc.add_paragraph(f"截止时间：{pdata['deadline']}    生成时间：{datetime.now().strftime('%Y-%m-%d %H:%M')}")
+    latest = latest_bids(df)
+    if latest.empty:
+        doc.add_paragraph("暂无有效报价。"); doc.save(path); return
+    award = min_cost_award(latest)
+    doc.add_paragraph(f"共 {len(pdata.get('products', {}))} 个产品，{latest['supplier'].nunique()} 家供应商参与报价；"
+                      f"按分项最低价授标，总金额 ¥{award['line_total'].sum():,.2f}。")
+    doc.add_heading("分项授标", level=2)
+    table = doc.add_table(rows=1, cols=5, style="Table Grid")
+    for cell, text in zip(table.rows[0].cells, ["产品", "推荐供应商", "单价", "数量", "小计"]): cell.text = text
+    for row in award.itertuples(index=False):
+        for cell, text in zip(table.add_row().cells, [str(row.product), str(row.supplier), f"{row.price:,.2f}", str(row.quantity), f"{row.line_total:,.2f}"]):
+            cell.text = text
+    doc.add_heading("供应商报价汇总", level=2)
+    table = doc.add_table(rows=1, cols=4, style="Table Grid")
+    for cell, text in zip(table.rows[0].cells, ["供应商", "报价产品数", "报价总额", "最低价产品数"]): cell.text = text
+    for row in supplier_totals(latest, len(pdata.get("products", {}))).itertuples(index=False):
+        for cell, text in zip(table.add_row().cells, [str(row.supplier), str(row.quoted), f"{row.total:,.2f}", str(row.firsts)]):
+            cell.text = text
+    doc.save(path)
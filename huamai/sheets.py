@@ -0,0 +1,64 @@
+import io
+import csv
+
+# --- 批量导入（CSV / Excel 逐行读取，不整表载入内存） ---
+PRODUCT_SHEET_COLUMNS = ["产品名", "数量", "描述"]
+QUOTE_SHEET_COLUMNS = ["产品名", "数量", "描述", "单价", "备注"]
+
+def iter_sheet_rows(uploaded_file):
+    uploaded_file.seek(0)
+    if uploaded_file.name.lower().endswith((".xlsx", ".xlsm")):
+        from openpyxl import load_workbook
+        wb = load_workbook(uploaded_file, read_only=True, data_only=True)
+        try:
+            for row in wb.active.iter_rows(values_only=True): yield row
+        finally: wb.close()
+    else:
+        # Excel 另存的 CSV 常为 GBK 编码，按文件头判断
+        head = uploaded_file.read(64 * 1024); uploaded_file.seek(0)
+        try: head.decode("utf-8"); encoding = "utf-8-sig"
+        except UnicodeDecodeError as e: encoding = "utf-8-sig" if e.start > len(head) - 4 else "gb18030"
+        text = io.TextIOWrapper(uploaded_file, encoding=encoding, newline="")
+        try: yield from csv.reader(text)
+        finally: text.detach()
+
+def iter_sheet_records(uploaded_file):
+    # 首个非空行作为表头，之后逐行产出 (行号, {列名: 值})
+    header = None
+    for line_no, row in enumerate(iter_sheet_rows(uploaded_file), start=1):
+        cells = ["" if v is None else str(v).strip() for v in row]
+        if not any(cells): continue
+        if header is None: header = cells; continue
+        yield line_no, dict(zip(header, cells))
+
+def parse_product_sheet(uploaded_file, existing):
+    items, errors, seen = [], [], set(existing)
+    for line_no, rec in iter_sheet_records(uploaded_file):
+        name = rec.get("产品名", "")
+        if not name: errors.append(f"第{line_no}行：缺少产品名"); continue
+        if name in seen: errors.append(f"第{line_no}行：产品「{name}」已存在，已跳过"); continue
+        try: qty = int(float(rec.get("数量") or 1))
+        except ValueError: errors.append(f"第{line_no}行：数量「{rec.get('数量')}」不是数字"); continue
+        if qty < 1: errors.append(f"第{line_no}行：数量需大于0"); continue
+        seen.add(name)
+        items.append({"name": name, "quantity": qty, "desc": rec.get("描述", "")})
+    return items, errors
+
+def parse_quote_sheet(uploaded_file, products):
+    # 返回 {产品: (单价, 备注)}；单价为空的行视为不报价
+    quotes, errors = {}, []
+    for line_no, rec in iter_sheet_records(uploaded_file):
+        name, price_text = rec.get("产品名", ""), rec.get("单价", "")
+        if not price_text: continue
+        if name not in products: errors.append(f"第{line_no}行：产品「{name}」不在本项目中"); continue
+        try: price = float(price_text)
+        except ValueError: errors.append(f"第{line_no}行：单价「{price_text}」不是数字"); continue
+        if price <= 0: errors.append(f"第{line_no}行：单价需大于0"); continue
+        quotes[name] = (price, rec.get("备注", ""))
+    return quotes, errors
+
+def sheet_template(columns, rows=()):
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(columns); writer.writerows(rows)
+    return buf.getvalue().encode("utf-8-sig")
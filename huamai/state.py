@@ -0,0 +1,538 @@
+import streamlit as st
+import random
+import string
+import os
+import threading
+from bisect import bisect_left, insort
+from datetime import datetime, timedelta
+from itertools import takewhile
+import hashlib
+import copy
+import json
+import re
+import sqlite3
+import time
+from huamai.metrics import timed, incr
+from huamai.storage import DATA_DIR, migrate_legacy_attachments
+
+# --- 工具函数 ---
+def generate_random_code(length=6):
+    return ''.join(random.choices(string.digits, k=length))
+
+def safe_parse_deadline(deadline_str):
+    if not isinstance(deadline_str, str): return datetime.now() + timedelta(hours=1)
+    for fmt in ["%Y-%m-%d %H:%M", "%Y-%m-%d %H:%M:%S", "%Y-%m-%d"]:
+        try: return datetime.strptime(deadline_str, fmt)
+        except ValueError: continue
+    return datetime.now() + timedelta(hours=1)
+
+def deadline_ts(deadline_str):
+    return safe_parse_deadline(deadline_str).timestamp()
+
+# --- 供应商登录索引（用户名 → 加盐哈希 → 项目ID） ---
+CODE_HASH_ITERATIONS = 10000
+DUMMY_SALT = "00" * 16
+
+def hash_code(code, salt):
+    return hashlib.pbkdf2_hmac("sha256", str(code).encode("utf-8"), bytes.fromhex(salt), CODE_HASH_ITERATIONS).hex()
+
+def make_cred(data, supplier, code):
+    # 哈希在写日志前算好，重放日志时无需再做 pbkdf2
+    entry = data["cred_index"].get(supplier)
+    salt = entry["salt"] if entry else os.urandom(16).hex()
+    return [salt, hash_code(code, salt)]
+
+def _index_remove(data, supplier, pid):
+    entry = data["cred_index"].get(supplier)
+    if not entry: return
+    digest = entry["by_pid"].pop(pid, None)
+    pids = entry["hashes"].get(digest, [])
+    if pid in pids: pids.remove(pid)
+    if not pids: entry["hashes"].pop(digest, None)
+    if not entry["by_pid"]: data["cred_index"].pop(supplier, None)
+
+def _index_add(data, supplier, pid, code, cred):
+    _index_remove(data, supplier, pid)
+    entry = data["cred_index"].setdefault(supplier, {"salt": cred[0] if cred else os.urandom(16).hex(), "hashes": {}, "by_pid": {}})
+    digest = cred[1] if cred and cred[0] == entry["salt"] else hash_code(code, entry["salt"])
+    entry["hashes"].setdefault(digest, []).append(pid)
+    entry["by_pid"][pid] = digest
+
+def lookup_credentials(username, password):
+    # 只比对哈希，不接触明文授权码；未知用户同样计算一次哈希，避免时间差泄露
+    entry = global_data["cred_index"].get(username)
+    digest = hash_code(password, entry["salt"] if entry else DUMMY_SALT)
+    if not entry: return []
+    return [pid for pid in entry["hashes"].get(digest, []) if pid in global_data["projects"]]
+
+# --- 产品报价聚合（随报价写入增量维护，看板直接读取） ---
+STATS_SCHEMA = 2
+
+def new_stats():
+    # ranking 为按各供应商最新报价排序的 [价格, 供应商] 列表，min/best 取自其首位，与整单比价、分项授标同一口径；
+    # suppliers 中的 best 为该供应商的历史最低价
+    return {"schema": STATS_SCHEMA, "count": 0, "min": None, "best": [], "suppliers": {}, "ranking": []}
+
+def stats_add_bid(stats, bid):
+    price, sup = bid["price"], bid["supplier"]
+    if price <= 0: return
+    stats["count"] += 1
+    ranking = stats["ranking"]
+    s = stats["suppliers"].get(sup)
+    if s is None: s = stats["suppliers"][sup] = {"latest": price, "best": price, "count": 0}
+    else:
+        ranking.pop(bisect_left(ranking, [s["latest"], sup]))
+        s["latest"], s["best"] = price, min(s["best"], price)
+    s["count"] += 1
+    insort(ranking, [price, sup])
+    stats["min"] = ranking[0][0]
+    stats["best"] = [x for _, x in takewhile(lambda r: r[0] == stats["min"], ranking)]
+
+def get_stats(p_info):
+    # 旧数据没有聚合（或聚合口径已变）时按已有报价补建一次
+    if p_info.get("stats", {}).get("schema") != STATS_SCHEMA:
+        stats = new_stats()
+        for bid in p_info.get("bids", []): stats_add_bid(stats, bid)
+        p_info["stats"] = stats
+    return p_info["stats"]
+
+def product_summary(pn, p_info):
+    stats = get_stats(p_info)
+    if not stats["count"]: return {"产品": pn, "数量": p_info["quantity"], "报价数": 0}
+    ranking = stats["ranking"]
+    return {
+        "产品": pn, "数量": p_info["quantity"], "最低单价": stats["min"],
+        "最低总价": stats["min"] * p_info["quantity"], "推荐供应商": ",".join(stats["best"]),
+        "报价数": stats["count"], "报价供应商数": len(stats["suppliers"]),
+        "次低价差": ranking[1][0] - ranking[0][0] if len(ranking) > 1 else None
+    }
+
+def _apply_bid(pdata, product, bid):
+    if product not in pdata["products"]: return
+    if "seq" not in bid: bid["seq"] = pdata.get("bid_seq", 0) + 1
+    pdata["bid_seq"] = max(pdata.get("bid_seq", 0), bid["seq"])
+    if bid.get("key"): pdata.setdefault("bid_keys", {})[bid["key"]] = bid["seq"]
+    p_info = pdata["products"][product]
+    p_info.setdefault("bids", []).append(bid)
+    stats_add_bid(get_stats(p_info), bid)
+
+# --- 供应商库索引（名称/联系人/电话二元组倒排 + 产品类型分类，随变更增量维护，不落盘） ---
+SUPPLIER_FIELDS = {"contact": "联系人", "phone": "电话", "job": "职位", "type": "产品类型", "address": "地址"}
+CATEGORY_SEP = re.compile(r"[,，、/;；\s]+")
+
+def supplier_categories(info):
+    return [c for c in CATEGORY_SEP.split(str(info.get("type") or "")) if c]
+
+def _bigrams(text):
+    t = str(text or "").lower()
+    return {t[i:i + 2] for i in range(len(t) - 1)}
+
+def _supplier_grams(name, info):
+    return _bigrams(name) | _bigrams(info.get("contact")) | _bigrams(info.get("phone"))
+
+def _sup_index_add(index, name, info):
+    i = bisect_left(index["names"], name)
+    if i < len(index["names"]) and index["names"][i] == name: return
+    index["names"].insert(i, name)
+    for g in _supplier_grams(name, info): index["grams"].setdefault(g, set()).add(name)
+    for c in supplier_categories(info): index["types"].setdefault(c, set()).add(name)
+
+def _sup_index_remove(index, name, info):
+    i = bisect_left(index["names"], name)
+    if i < len(index["names"]) and index["names"][i] == name: del index["names"][i]
+    for key, terms in (("grams", _supplier_grams(name, info)), ("types", supplier_categories(info))):
+        for t in terms:
+            names = index[key].get(t)
+            if names is None: continue
+            names.discard(name)
+            if not names: del index[key][t]
+
+def supplier_index(data):
+    # 首次使用时从 suppliers 全量建立，之后由 apply_op 增量维护
+    index = data.get("_sup_index")
+    if index is None:
+        index = data["_sup_index"] = {"names": [], "grams": {}, "types": {}}
+        for name, info in data["suppliers"].items(): _sup_index_add(index, name, info)
+    return index
+
+def supplier_matches(name, info, kw):
+    return kw in name.lower() or kw in str(info.get("contact") or "").lower() or kw in str(info.get("phone") or "")
+
+def search_suppliers(data, keyword="", categories=()):
+    # 关键字 ≥2 个字时先用二元组倒排求交缩小范围，再逐个核对子串；结果按名称排序
+    kw = keyword.strip().lower()
+    with get_lock("journal"):
+        index = supplier_index(data)
+        cands = set().union(*(index["types"].get(c, ()) for c in categories)) if categories else None
+        if len(kw) >= 2:
+            postings = sorted((index["grams"].get(g, set()) for g in _bigrams(kw)), key=len)
+            hits = postings[0].intersection(*postings[1:])
+            cands = hits if cands is None else cands & hits
+        names = list(index["names"]) if cands is None else sorted(cands)
+        if kw: names = [n for n in names if supplier_matches(n, data["suppliers"].get(n, {}), kw)]
+    return names
+
+def supplier_category_list(data):
+    with get_lock("journal"): return sorted(supplier_index(data)["types"])
+
+# --- 数据变更（所有修改都经由 apply_op，实时写入与日志重放共用同一套逻辑） ---
+BID_OPS = ("bid_add", "bids_add_batch")
+
+def _project_remove(data, pid):
+    pdata = data["projects"].pop(pid)
+    for s in pdata.get("codes", {}): _index_remove(data, s, pid)
+    entry = [deadline_ts(pdata["deadline"]), pid]
+    i = bisect_left(data["proj_index"], entry)
+    if i < len(data["proj_index"]) and data["proj_index"][i] == entry: del data["proj_index"][i]
+
+def apply_op(data, op, p):
+    projects = data["projects"]
+    pdata = projects.get(p.get("pid"))
+    if op == "project_create":
+        projects[p["pid"]] = {"name": p["name"], "deadline": p["deadline"], "codes": {}, "products": {}}
+        insort(data["proj_index"], [deadline_ts(p["deadline"]), p["pid"]])
+        for s, c in p["codes"].items():
+            projects[p["pid"]]["codes"][s] = c
+            _index_add(data, s, p["pid"], c, p.get("creds", {}).get(s))
+    elif op == "project_delete":
+        if pdata is None: return
+        _project_remove(data, p["pid"])
+    elif op == "project_archive":
+        # 项目内容已写入归档文件，热数据中只留一条目录记录
+        if pdata is None: return
+        _project_remove(data, p["pid"])
+        data.setdefault("archives", {})[p["pid"]] = p["meta"]
+    elif op == "project_restore":
+        if pdata is not None: return
+        projects[p["pid"]] = p["project"]
+        p["project"]["archive_hold"] = True  # 恢复后不再被自动归档，需手动再归档
+        insort(data["proj_index"], [deadline_ts(p["project"]["deadline"]), p["pid"]])
+        for s, c in p["project"].get("codes", {}).items(): _index_add(data, s, p["pid"], c, p.get("creds", {}).get(s))
+        data.setdefault("archives", {}).pop(p["pid"], None)
+    elif op == "code_add":
+        if pdata is None: return
+        pdata["codes"][p["supplier"]] = p["code"]
+        _index_add(data, p["supplier"], p["pid"], p["code"], p.get("cred"))
+        if p["supplier"] not in data["suppliers"]:
+            data["suppliers"][p["supplier"]] = {}
+            _sup_index_add(supplier_index(data), p["supplier"], {})
+    elif op == "code_remove":
+        if pdata is None: return
+        pdata["codes"].pop(p["supplier"], None)
+        _index_remove(data, p["supplier"], p["pid"])
+    elif op == "product_add":
+        if pdata is None: return
+        pdata["products"][p["name"]] = {"quantity": p["quantity"], "desc": p["desc"], "bids": [], "admin_file": p.get("admin_file"), "stats": new_stats()}
+    elif op == "product_delete":
+        if pdata is None: return
+        pdata["products"].pop(p["name"], None)
+    elif op == "products_add_batch":
+        if pdata is None: return
+        for item in p["items"]:
+            pdata["products"][item["name"]] = {"quantity": item["quantity"], "desc": item.get("desc", ""), "bids": [], "admin_file": None, "stats": new_stats()}
+    elif op == "bid_add":
+        if pdata is None: return
+        _apply_bid(pdata, p["product"], p["bid"])
+    elif op == "bids_add_batch":
+        if pdata is None: return
+        for item in p["bids"]: _apply_bid(pdata, item["product"], item["bid"])
+    elif op == "suppliers_set":
+        data["suppliers"] = p["suppliers"]
+        data.pop("_sup_index", None)
+    elif op == "suppliers_upsert":
+        # 只带变更的行：rows 为新增/修改，deleted 为删除的供应商名
+        suppliers, index = data["suppliers"], supplier_index(data)
+        for name in p.get("deleted", []):
+            if name in suppliers: _sup_index_remove(index, name, suppliers.pop(name))
+        for name, info in p["rows"].items():
+            if name in suppliers: _sup_index_remove(index, name, suppliers[name])
+            suppliers[name] = info
+            _sup_index_add(index, name, info)
+    # 项目内容版本号，分析缓存据此失效；struct_version 不随报价变化，供应商页面据此判断是否需要刷新
+    target = projects.get(p.get("pid"))
+    if target is not None:
+        target["version"] = target.get("version", 0) + 1
+        if op not in BID_OPS: target["struct_version"] = target.get("struct_version", 0) + 1
+
+# --- 持久化：状态后端（追加式日志 + 定期快照，多个进程共享同一后端） ---
+STATE_BACKEND = os.environ.get("HUAMAI_STATE_BACKEND", "sqlite")
+DB_PATH = os.path.join(DATA_DIR, "state.db")
+SNAPSHOT_EVERY = int(os.environ.get("HUAMAI_SNAPSHOT_EVERY", "500"))
+SYNC_INTERVAL = float(os.environ.get("HUAMAI_SYNC_INTERVAL", "0.5"))
+COMMIT_RETRIES = 50
+
+def _json_default(o):
+    if isinstance(o, datetime): return {"$dt": o.isoformat()}
+    raise TypeError(f"无法序列化的类型：{type(o).__name__}")
+
+def _json_hook(d):
+    return datetime.fromisoformat(d["$dt"]) if len(d) == 1 and "$dt" in d else d
+
+def dumps(obj):
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=_json_default)
+
+def loads(text):
+    return json.loads(text, object_hook=_json_hook)
+
+class WriteConflict(Exception):
+    pass
+
+class SQLiteBackend:
+    # 单机部署：同一台机器上的多个进程共享一个 SQLite(WAL) 文件。
+    # 替换为其他后端时需提供同样的方法：head / read_since / append / version / load_snapshot / snapshot_seq / save_snapshot / close
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS journal (seq INTEGER PRIMARY KEY AUTOINCREMENT, ts REAL NOT NULL, op TEXT NOT NULL, payload TEXT NOT NULL)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS snapshot (seq INTEGER PRIMARY KEY, ts REAL NOT NULL, data TEXT NOT NULL)")
+
+    def head(self):
+        # 已提交的最大日志序号（日志被快照压缩删除后仍然有效）
+        with self.lock:
+            row = self.conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'journal'").fetchone()
+            return row[0] if row else 0
+
+    def read_since(self, seq):
+        # seq 之后的全部日志；其中一段已被快照压缩删除时返回 None，调用方需从快照重新加载
+        with self.lock:
+            rows = self.conn.execute("SELECT seq, op, payload FROM journal WHERE seq > ? ORDER BY seq", (seq,)).fetchall()
+            first = rows[0][0] if rows else self.head() + 1
+            return None if first > seq + 1 else [(n, op, loads(payload)) for n, op, payload in rows]
+
+    def append(self, op, payload, expect):
+        # 乐观并发：只有日志头仍是 expect 时才写入，否则返回 None 由调用方追平后重试
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                if self.head() != expect:
+                    self.conn.execute("ROLLBACK")
+                    return None
+                seq = self.conn.execute("INSERT INTO journal (ts, op, payload) VALUES (?, ?, ?)", (time.time(), op, dumps(payload))).lastrowid
+                self.conn.execute("COMMIT")
+                return seq
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def version(self):
+        # 变更通知：其他进程每提交一次写入 data_version 就会变化（本连接自己的写入不计），轮询成本很低
+        with self.lock: return self.conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def load_snapshot(self):
+        with self.lock:
+            row = self.conn.execute("SELECT data FROM snapshot ORDER BY seq DESC LIMIT 1").fetchone()
+            return loads(row[0]) if row else None
+
+    def snapshot_seq(self):
+        with self.lock:
+            row = self.conn.execute("SELECT MAX(seq) FROM snapshot").fetchone()
+            return row[0] or 0
+
+    def save_snapshot(self, seq, text):
+        # 已有更新的快照（其他进程刚压缩过）时不写入
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                if (self.conn.execute("SELECT MAX(seq) FROM snapshot").fetchone()[0] or 0) >= seq:
+                    self.conn.execute("ROLLBACK")
+                    return False
+                self.conn.execute("INSERT OR REPLACE INTO snapshot (seq, ts, data) VALUES (?, ?, ?)", (seq, time.time(), text))
+                self.conn.execute("DELETE FROM snapshot WHERE seq < ?", (seq,))
+                self.conn.execute("DELETE FROM journal WHERE seq <= ?", (seq,))
+                self.conn.execute("COMMIT")
+                return True
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def close(self):
+        with self.lock: self.conn.close()
+
+def open_backend():
+    if STATE_BACKEND == "sqlite": return SQLiteBackend(DB_PATH)
+    raise ValueError(f"未知的状态后端：{STATE_BACKEND}")
+
+@st.cache_resource
+def get_backend():
+    return open_backend()
+
+@st.cache_resource
+def get_lock(name):
+    # 跨会话共享的锁，按名称区分
+    return threading.RLock()
+
+def default_data():
+    return {
+        "projects": {},
+        "cred_index": {},
+        "proj_index": [],
+        "archives": {},
+        "suppliers": {
+            "GYSA": {"contact": "张经理", "phone": "13800138000", "job": "销售总监", "type": "光纤光缆", "address": "江苏省南京市江宁区xxx号"},
+            "GYSB": {"contact": "李工", "phone": "13900139000", "job": "技术支持", "type": "网络机柜", "address": "江苏省苏州市工业园区xxx号"},
+            "GYSC": {"contact": "王总", "phone": "13700137000", "job": "总经理", "type": "综合布线", "address": "上海市浦东新区xxx号"}
+        },
+        "journal_seq": 0,
+        "snapshot_seq": 0
+    }
+
+# --- 全局数据初始化（最近快照 + 重放其后的日志） ---
+def load_state(backend):
+    data = backend.load_snapshot() or default_data()
+    if "proj_index" not in data: data["proj_index"] = sorted([deadline_ts(d["deadline"]), pid] for pid, d in data["projects"].items())
+    data.setdefault("archives", {})
+    catch_up(data, backend)
+    return migrate_legacy_attachments(data)
+
+def catch_up(data, backend):
+    # 重放其他进程写入的日志；后端版本未变时直接跳过，落后太多（所需日志已被快照压缩）时整体重新加载
+    version = backend.version()
+    if data.get("_backend_version") == version: return
+    rows = backend.read_since(data["journal_seq"])
+    if rows is None:
+        fresh = load_state(backend)
+        keep = {k: v for k, v in data.items() if k == "_snapshotting"}
+        data.clear(); data.update(fresh | keep)
+    else:
+        for seq, op, payload in rows:
+            apply_op(data, op, payload)
+            data["journal_seq"] = seq
+    data["_backend_version"] = version
+
+@st.cache_resource
+def init_global_data():
+    return load_state(get_backend())
+
+global_data = init_global_data()
+
+def sync_state():
+    with get_lock("journal"): catch_up(global_data, get_backend())
+
+@st.cache_resource
+def start_state_sync():
+    # 后台轮询共享后端，其他进程的写入在 SYNC_INTERVAL 内反映到本进程
+    def loop():
+        while True:
+            try: sync_state()
+            except Exception: incr("state_sync_failed")
+            time.sleep(SYNC_INTERVAL)
+    t = threading.Thread(target=loop, daemon=True, name="state-sync")
+    t.start()
+    return t
+
+@timed("journal_commit")
+def transact(build):
+    # build() 在追平后的最新状态上校验并返回 (op, payload, 结果)，op 为 None 表示无需写入。
+    # 追加时若日志头已被其他进程推进，则追平后重新 build。返回 (结果, 日志序号或 None)
+    backend = get_backend()
+    with get_lock("journal"):
+        for _ in range(COMMIT_RETRIES):
+            catch_up(global_data, backend)
+            op, payload, result = build()
+            if op is None: return result, None
+            seq = backend.append(op, payload, global_data["journal_seq"])
+            if seq is None:
+                incr("write_conflict")
+                continue
+            apply_op(global_data, op, payload)
+            global_data["journal_seq"] = seq
+            if seq - global_data["snapshot_seq"] >= SNAPSHOT_EVERY and not global_data.get("_snapshotting"):
+                global_data["_snapshotting"] = True
+                threading.Thread(target=write_snapshot, daemon=True).start()
+            return result, seq
+    raise WriteConflict("写入冲突重试次数过多")
+
+def commit(op, payload):
+    return transact(lambda: (op, payload, None))[1]
+
+def project_copy(pid):
+    # 在 journal 锁内取项目某一版本的一致副本，供后台线程读取。报价记录写入后不再修改，只复制产品层和
+    # 报价列表，聚合另行深拷贝；不做序列化，持锁时间很短。返回 (版本, 副本)，项目不存在时为 (None, None)
+    with get_lock("journal"):
+        pdata = global_data["projects"].get(pid)
+        if pdata is None: return None, None
+        products = {pn: {**pi, "bids": list(pi.get("bids", [])), **({"stats": copy.deepcopy(pi["stats"])} if "stats" in pi else {})}
+                    for pn, pi in pdata.get("products", {}).items()}
+        return pdata.get("version", 0), {**pdata, "products": products, "codes": dict(pdata.get("codes", {})), "bid_keys": dict(pdata.get("bid_keys", {}))}
+
+def write_snapshot():
+    # 压缩：写入完整快照后删除其之前的日志，冷启动只需重放很短的尾部；其他进程刚做过快照时跳过。
+    # 快照不从 global_data 序列化，而是在独立连接上把上一份快照加其后的日志重放到 seq 得到一份私有副本，
+    # 全程不持有 journal 锁，报价提交和各会话的同步不会被快照阻塞
+    backend = open_backend()
+    try:
+        seq, latest = global_data["journal_seq"], backend.snapshot_seq()
+        if seq - latest < SNAPSHOT_EVERY:
+            global_data["snapshot_seq"] = latest
+            return
+        data = backend.load_snapshot() or default_data()
+        if "proj_index" not in data: data["proj_index"] = sorted([deadline_ts(d["deadline"]), pid] for pid, d in data["projects"].items())
+        data.setdefault("archives", {})
+        rows = backend.read_since(data["journal_seq"])
+        if rows is None: return  # 重放期间其他进程已压缩，留给下一次
+        for n, op, payload in rows:
+            if n > seq: break
+            apply_op(data, op, payload)
+        migrate_legacy_attachments(data)
+        if backend.save_snapshot(seq, dumps({k: v for k, v in data.items() if not k.startswith("_")} | {"journal_seq": seq, "snapshot_seq": seq})):
+            global_data["snapshot_seq"] = seq
+        else: global_data["snapshot_seq"] = backend.snapshot_seq()
+    finally:
+        backend.close()
+        global_data["_snapshotting"] = False
+
+# --- 报价写入（在追平后的最新状态上校验，截止时间以写入时刻为准） ---
+def accepted_bid(pdata, product, key):
+    # 幂等键对应且仍在该产品中的报价；产品被删除后重新添加时旧键不再生效
+    seq = pdata.get("bid_keys", {}).get(key)
+    if seq is None or product not in pdata["products"]: return None
+    return next((b for b in pdata["products"][product]["bids"] if b.get("seq") == seq), None)
+
+@timed("submit_bid")
+def submit_bid(pid, product, supplier, price, remark, file_data, idem_key):
+    # 返回 (报价, 错误信息)；同一幂等键重复提交时直接返回已受理的那条报价
+    def build():
+        pdata = global_data["projects"].get(pid)
+        if not pdata or product not in pdata["products"]: return None, None, (None, "项目或产品已被删除")
+        if supplier not in pdata.get("codes", {}): return None, None, (None, "报价授权已被移除")
+        dup = accepted_bid(pdata, product, idem_key)
+        if dup: return None, None, (dup, None)
+        accepted = datetime.now()
+        if accepted > safe_parse_deadline(pdata.get("deadline", "")): return None, None, (None, "报价已截止")
+        bid = {
+            "supplier": supplier, "price": price, "remark": remark, "file": file_data,
+            "time": accepted.strftime("%H:%M:%S"), "datetime": accepted,
+            "seq": pdata.get("bid_seq", 0) + 1, "key": idem_key
+        }
+        return "bid_add", {"pid": pid, "product": product, "bid": bid}, (bid, None)
+    with get_lock(f"project:{pid}"): result, seq = transact(build)
+    if seq: incr("bid_accepted")
+    return result
+
+@timed("submit_bids_batch")
+def submit_bids_batch(pid, supplier, items, idem_key):
+    # items: [(产品, 单价, 备注)]；整批校验通过后作为一条日志记录提交，任一条不合法则整批不提交。
+    # 幂等按条判断：已受理且仍存在的条目跳过，其余（如产品被删除后重新添加）照常写入
+    def build():
+        pdata = global_data["projects"].get(pid)
+        if not pdata: return None, None, (0, ["项目已被删除"])
+        if supplier not in pdata.get("codes", {}): return None, None, (0, ["报价授权已被移除"])
+        todo = [item for item in items if not accepted_bid(pdata, item[0], f"{idem_key}:{item[0]}")]
+        if not todo: return None, None, (len(items), [])
+        errors = [f"产品「{pn}」不存在" for pn, _, _ in todo if pn not in pdata["products"]]
+        errors += [f"产品「{pn}」单价需大于0" for pn, price, _ in todo if not price > 0]
+        if errors: return None, None, (0, errors)
+        accepted = datetime.now()
+        if accepted > safe_parse_deadline(pdata.get("deadline", "")): return None, None, (0, ["报价已截止"])
+        seq = pdata.get("bid_seq", 0)
+        bids = [{"product": pn, "bid": {
+            "supplier": supplier, "price": price, "remark": remark, "file": None,
+            "time": accepted.strftime("%H:%M:%S"), "datetime": accepted, "seq": seq + i + 1, "key": f"{idem_key}:{pn}"
+        }} for i, (pn, price, remark) in enumerate(todo)]
+        return "bids_add_batch", {"pid": pid, "bids": bids}, (len(bids), [])
+    with get_lock(f"project:{pid}"): result, seq = transact(build)
+    if seq: incr("bid_accepted", result[0])
+    return result
@@ -0,0 +1,111 @@
+import streamlit as st
+import io
+import base64
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+import hashlib
+from huamai.metrics import timed
+
+# --- 数据目录 ---
+DATA_DIR = os.environ.get("HUAMAI_DATA_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data"))
+
+# --- 附件存储（按内容哈希落盘，内存中只保留元数据） ---
+BLOB_DIR = os.path.join(DATA_DIR, "blobs")
+CHUNK_SIZE = 1024 * 1024
+BLOB_CACHE_BYTES = int(os.environ.get("HUAMAI_BLOB_CACHE_MB", "64")) * 1024 * 1024
+
+def blob_path(digest):
+    return os.path.join(BLOB_DIR, digest[:2], digest)
+
+def put_blob_stream(stream):
+    # 分块读取，边算 sha256 边写临时文件；内容相同的文件只落盘一份
+    os.makedirs(BLOB_DIR, exist_ok=True)
+    h, size = hashlib.sha256(), 0
+    fd, tmp = tempfile.mkstemp(dir=BLOB_DIR, prefix=".up_")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for chunk in iter(lambda: stream.read(CHUNK_SIZE), b""):
+                h.update(chunk); f.write(chunk); size += len(chunk)
+        digest = h.hexdigest()
+        path = blob_path(digest)
+        if os.path.exists(path): os.remove(tmp); os.utime(path)  # 刷新时间，归档清理据此跳过刚被引用的文件
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(tmp, path)
+        return digest, size
+    except Exception:
+        if os.path.exists(tmp): os.remove(tmp)
+        raise
+
+@st.cache_resource
+def get_blob_cache():
+    # 热附件内容的 LRU 缓存（按字节数限容），淘汰后下次从磁盘重读
+    return {"lock": threading.Lock(), "items": OrderedDict(), "bytes": 0, "hits": 0, "misses": 0, "evictions": 0}
+
+@timed("read_blob")
+def read_blob(digest):
+    c = get_blob_cache()
+    with c["lock"]:
+        data = c["items"].get(digest)
+        if data is not None:
+            c["items"].move_to_end(digest); c["hits"] += 1
+            return data
+        c["misses"] += 1
+    with open(blob_path(digest), "rb") as f: data = f.read()
+    # 单个文件超过容量的 1/4 不进缓存，避免一个大文件把热点全部挤出
+    if len(data) <= BLOB_CACHE_BYTES // 4:
+        with c["lock"]:
+            if digest not in c["items"]:
+                c["items"][digest] = data; c["bytes"] += len(data)
+                while c["bytes"] > BLOB_CACHE_BYTES:
+                    _, old = c["items"].popitem(last=False)
+                    c["bytes"] -= len(old); c["evictions"] += 1
+    return data
+
+def blob_cache_stats():
+    c = get_blob_cache()
+    with c["lock"]:
+        return {"hits": c["hits"], "misses": c["misses"], "evictions": c["evictions"],
+                "files": len(c["items"]), "bytes": c["bytes"], "capacity": BLOB_CACHE_BYTES}
+
+@timed("store_uploaded_file")
+def store_uploaded_file(uploaded_file, max_size=200*1024*1024):
+    if uploaded_file is None: return None
+    file_size = uploaded_file.size
+    if file_size > max_size:
+        st.error(f"文件过大（{file_size/1024/1024:.1f}MB），最大支持200MB")
+        return None
+    try:
+        uploaded_file.seek(0)
+        digest, size = put_blob_stream(uploaded_file)
+        return {"name": uploaded_file.name, "type": uploaded_file.type, "size": size, "hash": digest}
+    except Exception as e:
+        st.error(f"文件处理失败：{str(e)}")
+        return None
+
+def migrate_attachment(file_dict):
+    # 兼容旧数据：把内嵌 base64 的附件写入附件库，只保留元数据
+    if not isinstance(file_dict, dict) or "data" not in file_dict: return file_dict
+    digest, size = put_blob_stream(io.BytesIO(base64.b64decode(file_dict["data"])))
+    return {"name": file_dict.get("name", "附件"), "type": file_dict.get("type") or "application/octet-stream", "size": size, "hash": digest}
+
+def migrate_legacy_attachments(data):
+    for pdata in data.get("projects", {}).values():
+        for p_info in pdata.get("products", {}).values():
+            if p_info.get("admin_file"): p_info["admin_file"] = migrate_attachment(p_info["admin_file"])
+            for bid in p_info.get("bids", []):
+                if bid.get("file"): bid["file"] = migrate_attachment(bid["file"])
+    return data
+
+def render_attachment(file_dict, key, label_prefix=""):
+    # 点击时才读取文件内容，页面重跑不再携带附件数据
+    if not isinstance(file_dict, dict): return
+    if "data" in file_dict: file_dict = migrate_attachment(file_dict)
+    if not file_dict.get("hash"): return
+    display_label = f"📎 {label_prefix} {file_dict['name']}" if label_prefix else f"📎 {file_dict['name']}"
+    digest = file_dict["hash"]
+    st.download_button(display_label, data=lambda: read_blob(digest), file_name=file_dict["name"],
+                       mime=file_dict.get("type") or "application/octet-stream", key=key,
+                       on_click="ignore", type="tertiary")
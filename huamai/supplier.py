@@ -0,0 +1,154 @@
+import streamlit as st
+import uuid
+import hashlib
+from datetime import datetime
+from huamai.metrics import timed, incr
+from huamai.storage import render_attachment, store_uploaded_file
+from huamai.state import global_data, safe_parse_deadline, submit_bid, get_stats, submit_bids_batch
+from huamai.sheets import sheet_template, QUOTE_SHEET_COLUMNS, parse_quote_sheet
+from huamai.live import start_live_watch, render_countdown
+
+# --- 供应商端页面 ---
+def form_idem_key(lock_key, *content):
+    # 幂等键绑定表单内容：内容不变时沿用同一个键，重复点击只受理一次；内容改变后才换新键
+    sig = hashlib.md5(repr(content).encode("utf-8")).hexdigest()[:12]
+    locks = st.session_state["submit_lock"]
+    if locks.get(lock_key, (None, None))[0] != sig: locks[lock_key] = (sig, uuid.uuid4().hex)
+    return f"{locks[lock_key][1]}:{sig}"
+
+@timed("render_supplier_dashboard")
+def render_supplier_dashboard():
+    if "user" not in st.session_state: st.rerun()
+    
+    supplier_name = st.session_state["user"]
+    project_id = st.session_state["project_id"]
+    project_data = global_data["projects"].get(project_id)
+    
+    if not project_data:
+        st.error("项目已结束或不存在"); return
+    if supplier_name not in project_data.get("codes", {}):
+        st.error("您在该项目的报价授权已被移除"); return
+
+    deadline = safe_parse_deadline(project_data.get("deadline", ""))
+    is_closed = datetime.now() > deadline
+    # 产品/授权变化或到达截止时间时自动刷新；其他供应商报价不会触发本页重跑
+    start_live_watch("live_supplier", lambda: (project_id, project_data.get("struct_version", 0), datetime.now() > deadline,
+                                               project_id in global_data["projects"]))
+
+    # 头部卡片
+    hc1, hc2 = st.columns([3, 1], vertical_alignment="center")
+    with hc1:
+        st.markdown(f"""
+        <div class="ui-card" style="border-left: 5px solid #3b82f6;">
+            <h3 style="margin:0;">👤 {supplier_name} | 正在报价</h3>
+            <div style="color:#666; margin-top:5px;">📋 项目：{project_data.get('name')}</div>
+        </div>
+        """, unsafe_allow_html=True)
+    with hc2: render_countdown(deadline)
+    
+    col_l, col_m, col_r = st.columns([5, 1, 1])
+    my_pids = [x for x in st.session_state.get("project_ids", [project_id]) if x in global_data["projects"]]
+    if len(my_pids) > 1:
+        with col_l:
+            sel = st.selectbox("切换项目", my_pids, index=my_pids.index(project_id) if project_id in my_pids else 0,
+                               format_func=lambda x: f"{global_data['projects'][x]['deadline']} | {global_data['projects'][x]['name']}",
+                               label_visibility="collapsed")
+            if sel != project_id:
+                st.session_state["project_id"] = sel; st.rerun()
+    with col_m:
+        if st.button("🔄 刷新", use_container_width=True): st.rerun()
+    with col_r:
+        if st.button("退出", use_container_width=True):
+            st.session_state.clear(); st.rerun()
+
+    # 产品列表
+    products = project_data.get("products", {})
+    if not products: st.info("暂无报价产品"); return
+
+    if "submit_lock" not in st.session_state: st.session_state["submit_lock"] = {}
+
+    # 产品较多时默认用批量报价表，一次提交全部价格
+    mode = st.radio("报价方式", ["逐项报价", "批量报价"], index=1 if len(products) > 20 else 0, horizontal=True, label_visibility="collapsed")
+    if mode == "批量报价": render_batch_quote(project_id, products, supplier_name, is_closed)
+    else: render_product_forms(project_id, products, supplier_name, is_closed)
+
+@timed("render_product_forms")
+def render_product_forms(project_id, products, supplier_name, is_closed):
+    for p_name, p_info in list(products.items()):
+        with st.container():
+            st.markdown(f'<div class="ui-card">', unsafe_allow_html=True)
+            
+            # 产品标题行 (显示附件下载)
+            c1, c2 = st.columns([3, 1])
+            with c1:
+                st.markdown(f"**📦 {p_name}** <span style='color:#666; font-size:0.9em'>({p_info.get('desc','')})</span>", unsafe_allow_html=True)
+                # --- 核心修改：显示甲方上传的规格书 ---
+                if p_info.get("admin_file"):
+                    render_attachment(p_info["admin_file"], f"dl_spec_{project_id}_{p_name}", "📥 下载规格书/图纸")
+                # ----------------------------------
+            with c2:
+                st.markdown(f"<div style='text-align:right; font-weight:bold;'>需求数量: {p_info['quantity']}</div>", unsafe_allow_html=True)
+            
+            st.markdown("<hr style='margin: 10px 0; border-top: 1px solid #eee;'>", unsafe_allow_html=True)
+
+            # 报价表单
+            with st.form(key=f"form_{project_id}_{p_name}", border=False):
+                fc1, fc2, fc3, fc4 = st.columns([1.5, 2, 2, 1])
+                with fc1:
+                    price = st.number_input("单价(¥)", min_value=0.0, step=0.1, key=f"p_{project_id}_{p_name}")
+                with fc2:
+                    remark = st.text_input("备注", placeholder="选填", key=f"r_{project_id}_{p_name}")
+                with fc3:
+                    file_up = st.file_uploader("报价附件", key=f"f_{project_id}_{p_name}")
+                with fc4:
+                    st.markdown("<br>", unsafe_allow_html=True)
+                    sub_btn = st.form_submit_button("提交报价", disabled=is_closed, use_container_width=True, type="primary")
+
+                if sub_btn:
+                    if is_closed: st.error("已截止")
+                    elif price <= 0: st.error("价格需大于0")
+                    else:
+                        f_data = store_uploaded_file(file_up)
+                        idem_key = form_idem_key(f"{project_id}:{p_name}", price, remark, f_data["hash"] if f_data else None)
+                        bid, err = submit_bid(project_id, p_name, supplier_name, price, remark, f_data, idem_key)
+                        if err: incr("bid_rejected"); st.error(err)
+                        else:
+                            st.success("✅ 提交成功")
+                            st.rerun()
+            st.markdown('</div>', unsafe_allow_html=True)
+
+@timed("render_batch_quote")
+def render_batch_quote(project_id, products, supplier_name, is_closed):
+    st.markdown('<div class="ui-card">', unsafe_allow_html=True)
+    
+    rows = []
+    for pn, pi in list(products.items()):
+        mine = get_stats(pi)["suppliers"].get(supplier_name)
+        rows.append({"产品名": pn, "数量": pi["quantity"], "描述": pi.get("desc", ""), "我的最新报价": mine["latest"] if mine else None, "单价": None, "备注": ""})
+    
+    t1, t2 = st.columns([3, 1])
+    sheet = t1.file_uploader("上传已填写的报价单（CSV / Excel）", type=["csv", "xlsx"], key=f"quote_sheet_{project_id}")
+    with t2:
+        st.download_button("📄 下载报价模板", data=lambda: sheet_template(QUOTE_SHEET_COLUMNS, [[r["产品名"], r["数量"], r["描述"], "", ""] for r in rows]),
+                           file_name="报价模板.csv", mime="text/csv", on_click="ignore", use_container_width=True)
+    if sheet is not None:
+        quotes, errors = parse_quote_sheet(sheet, products)
+        for e in errors[:20]: st.warning(e)
+        for r in rows:
+            if r["产品名"] in quotes: r["单价"], r["备注"] = quotes[r["产品名"]]
+        st.caption(f"已从报价单读取 {len(quotes)} 项报价，可在下表中继续修改")
+    
+    edited = st.data_editor(rows, key=f"quote_grid_{project_id}_{sheet.file_id if sheet else ''}", hide_index=True, use_container_width=True,
+                            disabled=["产品名", "数量", "描述", "我的最新报价"], height=min(35 * (len(rows) + 1) + 3, 600),
+                            column_config={"单价": st.column_config.NumberColumn("单价(¥)", min_value=0.0, format="%.2f"),
+                                           "我的最新报价": st.column_config.NumberColumn(format="¥%.2f")})
+    items = [(r["产品名"], float(r["单价"]), r["备注"] or "") for r in edited if r["单价"] is not None and r["单价"] == r["单价"]]
+    if st.button(f"✅ 提交全部报价（{len(items)} 项）", type="primary", disabled=is_closed or not items, key=f"batch_submit_{project_id}"):
+        count, errors = submit_bids_batch(project_id, supplier_name, items, form_idem_key(f"{project_id}:__batch__", sorted(items)))
+        if errors:
+            incr("bid_rejected", len(items))
+            for e in errors: st.error(e)
+        else:
+            st.success(f"✅ 已提交 {count} 项报价")
+            st.rerun()
+    st.markdown('</div>', unsafe_allow_html=True)
@@ -0,0 +1,113 @@
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault("HUAMAI_DATA_DIR", tempfile.mkdtemp())
+
+from huamai import state
+from huamai.metrics import get_metrics
+
+
+def persisted(data):
+    return {k: v for k, v in data.items() if not k.startswith("_")}
+
+
+def wait_snapshot():
+    while state.global_data.get("_snapshotting"): time.sleep(0.01)
+
+
+def new_project(pid, suppliers, products):
+    deadline = (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d %H:%M")
+    codes = {s: state.generate_random_code() for s in suppliers}
+    state.commit("project_create", {"pid": pid, "name": f"项目{pid}", "deadline": deadline, "codes": codes,
+                                    "creds": {s: state.make_cred(state.global_data, s, c) for s, c in codes.items()}})
+    state.commit("products_add_batch", {"pid": pid, "items": [{"name": n, "quantity": 2, "desc": ""} for n in products]})
+
+
+def test_replay_after_compaction_matches_live_state(monkeypatch):
+    monkeypatch.setattr(state, "SNAPSHOT_EVERY", 20)
+    new_project("S1", ["GYSA", "GYSB"], ["光缆", "机柜", "跳线"])
+    new_project("S2", ["GYSC"], ["配线架"])
+    for i in range(60):
+        state.submit_bid("S1", ["光缆", "机柜", "跳线"][i % 3], ["GYSA", "GYSB"][i % 2], 100 - i, f"第{i}次", None, f"replay-{i}")
+    state.submit_bids_batch("S1", "GYSA", [("光缆", 9.5, ""), ("机柜", 20.0, "含安装")], "replay-batch")
+    state.commit("code_add", {"pid": "S1", "supplier": "GYSC", "code": "135790", "cred": state.make_cred(state.global_data, "GYSC", "135790")})
+    state.commit("code_remove", {"pid": "S1", "supplier": "GYSB"})
+    state.commit("product_delete", {"pid": "S1", "name": "跳线"})
+    state.commit("product_add", {"pid": "S1", "name": "跳线", "quantity": 5, "desc": "重新添加", "admin_file": None})
+    state.commit("suppliers_upsert", {"rows": {"GYSD": {"contact": "赵工", "type": "光纤光缆"}}, "deleted": []})
+    state.commit("project_delete", {"pid": "S2"})
+    wait_snapshot()
+    backend = state.open_backend()
+    try:
+        assert backend.snapshot_seq() > 0
+        assert persisted(state.load_state(backend)) == persisted(state.global_data)
+    finally:
+        backend.close()
+
+
+def test_append_with_stale_expect_is_rejected():
+    state.sync_state()
+    backend = state.open_backend()
+    try:
+        head = backend.head()
+        assert backend.append("suppliers_upsert", {"rows": {}, "deleted": []}, head - 1) is None
+        assert backend.head() == head
+        assert backend.append("suppliers_upsert", {"rows": {}, "deleted": []}, head) == head + 1
+    finally:
+        backend.close()
+    state.sync_state()
+    assert state.global_data["journal_seq"] == head + 1
+
+
+def test_process_behind_compaction_reloads(monkeypatch):
+    monkeypatch.setattr(state, "SNAPSHOT_EVERY", 10)
+    new_project("L1", ["GYSA"], ["光缆"])
+    wait_snapshot()
+    # 另一个进程：独立连接上的一份状态，在其落后期间日志被压缩
+    other = state.open_backend()
+    try:
+        behind = state.load_state(other)
+        for i in range(30): state.submit_bid("L1", "光缆", "GYSA", 50 + i, "", None, f"behind-{i}")
+        wait_snapshot()
+        state.write_snapshot()
+        assert other.read_since(behind["journal_seq"]) is None
+        state.catch_up(behind, other)
+        assert persisted(behind) == persisted(state.global_data)
+    finally:
+        other.close()
+
+
+def test_commit_retries_after_concurrent_append():
+    new_project("C1", ["GYSA"], ["光缆"])
+    before = get_metrics()["counters"].get("write_conflict", 0)
+    other, calls = state.open_backend(), []
+
+    def build():
+        # 第一次 build 时另一个进程抢先写入，日志头前移
+        if not calls: other.append("product_add", {"pid": "C1", "name": "机柜", "quantity": 1, "desc": ""}, other.head())
+        calls.append(1)
+        return "product_add", {"pid": "C1", "name": "跳线", "quantity": 1, "desc": ""}, len(calls)
+
+    try:
+        result, seq = state.transact(build)
+    finally:
+        other.close()
+    assert result == 2 and seq == state.global_data["journal_seq"]
+    assert get_metrics()["counters"].get("write_conflict", 0) == before + 1
+    assert set(state.global_data["projects"]["C1"]["products"]) == {"光缆", "机柜", "跳线"}
+
+
+def test_product_stats_follow_latest_bid_per_supplier():
+    stats = state.new_stats()
+    for sup, price in [("S1", 10), ("S1", 20), ("S2", 15)]: state.stats_add_bid(stats, {"supplier": sup, "price": price})
+    assert (stats["min"], stats["best"], stats["count"]) == (15, ["S2"], 3)
+    assert stats["ranking"] == [[15, "S2"], [20, "S1"]]
+    assert stats["suppliers"]["S1"] == {"latest": 20, "best": 10, "count": 2}
+
+
+def test_stats_without_schema_are_rebuilt():
+    p_info = {"quantity": 1, "bids": [{"supplier": "S1", "price": 10}, {"supplier": "S1", "price": 20}],
+              "stats": {"count": 2, "min": 10, "best": ["S1"], "suppliers": {}, "ranking": [[10, "S1"]]}}
+    assert state.get_stats(p_info)["min"] == 20
@@ -0,0 +1,98 @@
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+os.environ.setdefault("HUAMAI_DATA_DIR", tempfile.mkdtemp())
+
+from streamlit.testing.v1 import AppTest
+from huamai import state
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+
+def make_project(pid, supplier, code, products):
+    deadline = (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d %H:%M")
+    state.commit("project_create", {"pid": pid, "name": f"测试项目{pid}", "deadline": deadline, "codes": {supplier: code},
+                                    "creds": {supplier: state.make_cred(state.global_data, supplier, code)}})
+    state.commit("products_add_batch", {"pid": pid, "items": [{"name": n, "quantity": 1, "desc": ""} for n in products]})
+
+
+def login(user, code):
+    at = AppTest.from_file(APP_PATH, default_timeout=60).run()
+    at.text_input[0].input(user); at.text_input[1].input(code)
+    next(b for b in at.button if b.label == "立即登录").click().run()
+    assert not at.exception, at.exception
+    return at
+
+
+def submit(at, price):
+    at.number_input[0].set_value(price)
+    next(b for b in at.button if b.label == "提交报价").click().run()
+    assert not at.exception, at.exception
+
+
+def bids(pid, product):
+    return state.global_data["projects"][pid]["products"][product]["bids"]
+
+
+def test_resubmitting_same_form_keeps_one_bid():
+    make_project("T1", "GYST1", "246810", ["光缆"])
+    at = login("GYST1", "246810")
+    submit(at, 12.5)
+    submit(at, 12.5)
+    assert [b["price"] for b in bids("T1", "光缆")] == [12.5]
+
+
+def test_changed_price_is_a_new_bid():
+    make_project("T2", "GYST2", "135791", ["机柜"])
+    at = login("GYST2", "135791")
+    submit(at, 12.5)
+    submit(at, 11.0)
+    submit(at, 12.5)
+    assert [b["price"] for b in bids("T2", "机柜")] == [12.5, 11.0, 12.5]
+
+
+def readd_product(pid, product):
+    state.commit("product_delete", {"pid": pid, "name": product})
+    state.commit("product_add", {"pid": pid, "name": product, "quantity": 3, "desc": "", "admin_file": None})
+
+
+def submit_batch(at, pid, sheet):
+    at.file_uploader(key=f"quote_sheet_{pid}").set_value(("报价单.csv", sheet.encode("utf-8-sig"), "text/csv")).run()
+    next(b for b in at.button if b.label.startswith("✅ 提交全部报价")).click().run()
+    assert not at.exception, at.exception
+
+
+def test_resubmitting_same_batch_keeps_one_batch():
+    make_project("T3", "GYST3", "112233", ["光缆", "机柜"])
+    at = login("GYST3", "112233")
+    at.radio[0].set_value("批量报价").run()
+    at.file_uploader(key="quote_sheet_T3").set_value(("报价单.csv", "产品名,数量,描述,单价,备注\n光缆,1,,12.5,\n机柜,1,,30,\n".encode("utf-8-sig"), "text/csv")).run()
+    for _ in range(2):
+        next(b for b in at.button if b.label.startswith("✅ 提交全部报价")).click().run()
+        assert not at.exception, at.exception
+    assert [b["price"] for b in bids("T3", "光缆")] == [12.5]
+    assert [b["price"] for b in bids("T3", "机柜")] == [30.0]
+
+
+def test_same_price_after_product_readded_is_stored():
+    make_project("T4", "GYST4", "445566", ["光缆"])
+    at = login("GYST4", "445566")
+    submit(at, 12.5)
+    readd_product("T4", "光缆")
+    at.run()
+    submit(at, 12.5)
+    assert [b["price"] for b in bids("T4", "光缆")] == [12.5]
+
+
+def test_same_batch_after_product_readded_stores_only_missing_items():
+    make_project("T5", "GYST5", "778899", ["光缆", "机柜"])
+    at = login("GYST5", "778899")
+    at.radio[0].set_value("批量报价").run()
+    sheet = "产品名,数量,描述,单价,备注\n光缆,1,,12.5,\n机柜,1,,30,\n"
+    submit_batch(at, "T5", sheet)
+    readd_product("T5", "光缆")
+    at.run()
+    submit_batch(at, "T5", sheet)
+    assert [b["price"] for b in bids("T5", "光缆")] == [12.5]
+    assert [b["price"] for b in bids("T5", "机柜")] == [30.0]